@@ -2,12 +2,16 @@ from patterndb import ActualLocationKeyGenerator, CornerOrientationAxisKeyGenera
 from structs import *
 from astar import *
 from orientationcalc import calc_corner_orientations, calc_edge_orientations
+from coordinates import CosetCoordinate, DistanceTable, LocationCoordinate, OrientationCoordinate, PhaseCoordinate
+from canonical import automaton
+from cubie import CORNER_SLOTS, EDGE_SLOTS, SLOTS, CubieCube, PackedCubeStates, apply_moves, merge_turns, solved_like
 import sys
 
-class Group0To1Problem(Problem):
+class Group0To1Problem(PackedCubeStates, Problem):
     def __init__(self, cube):
         self._initial_state = cube
         self._actions = QUARTER_FACE + HALF_FACE
+        self._moves = automaton(self._actions)
         self.correct_orientations = calc_edge_orientations(QUARTER_X+QUARTER_Y+HALF_FACE)
         self._dbs = [
             build_db("OrientationEdge", Cube(3).sub_cube(edge), 6, QUARTER_X+QUARTER_Y+QUARTER_Z, pattern_db_options={
@@ -24,7 +28,7 @@ class Group0To1Problem(Problem):
         return c == 0
 
     def actions(self, node):
-        return filter_actions(self._actions, node.action)
+        return self._moves.next_actions(node)
 
     def apply_action(self, state, action):
         return state.apply(action), 1
@@ -39,10 +43,11 @@ class Group0To1Problem(Problem):
             c += tuple(b.orientations) not in self.correct_orientations[b.solved_location]
         return c
 
-class Group1To2Problem(Problem):
+class Group1To2Problem(PackedCubeStates, Problem):
     def __init__(self, cube):
         self._initial_state = cube
         self._actions = QUARTER_X + QUARTER_Y + HALF_FACE
+        self._moves = automaton(self._actions)
         model_cube = Cube(3)
         corner_cube = model_cube.sub_cube(corner)
         one_slice_edge_cube = model_cube.sub_cube(edge & solved('x', 0))
@@ -64,7 +69,7 @@ class Group1To2Problem(Problem):
         return c == 0
 
     def actions(self, node):
-        return filter_actions(self._actions, node.action)
+        return self._moves.next_actions(node)
 
     def apply_action(self, state, action):
         return state.apply(action), 1
@@ -81,10 +86,11 @@ class Group1To2Problem(Problem):
             c += (not corner_o) or (not block_slice)
         return c
 
-class Group2To3Problem(Problem):
+class Group2To3Problem(PackedCubeStates, Problem):
     def __init__(self, cube):
         self._initial_state = cube
         self._actions = QUARTER_X + HALF_FACE
+        self._moves = automaton(self._actions)
         model_cube = Cube(3)
         edge_cube = model_cube.sub_cube(edge)
         corner_cube = model_cube.sub_cube(corner)
@@ -108,7 +114,7 @@ class Group2To3Problem(Problem):
         return c == 0 and self.corner_perm_db.contains_cube(state)
 
     def actions(self, node):
-        return filter_actions(self._actions, node.action)
+        return self._moves.next_actions(node)
 
     def apply_action(self, state, action):
         return state.apply(action), 1
@@ -128,25 +134,30 @@ class Group2To3Problem(Problem):
         return c
 
 
-class Group3ToFinalProblem(Problem):
+class Group3ToFinalProblem(PackedCubeStates, Problem):
     def __init__(self, cube):
         self._initial_state = cube
         self._actions = HALF_FACE
+        self._moves = automaton(self._actions)
         model_cube = Cube(3).sub_cube_from_cube(cube)
         edge_cube = model_cube.sub_cube(edge)
         corner_cube = model_cube.sub_cube(corner)
         self._dbs = [build_db("finaledge", edge_cube, 9, HALF_FACE),
                      build_db("finalcorner", corner_cube, 9, HALF_FACE),
                      build_db("finalfull", model_cube, 8, HALF_FACE)]
+        self._goal_state = solved_like(cube)
 
     def initial_state(self):
         return self._initial_state
 
+    def goal_state(self):
+        return self._goal_state
+
     def goal_test(self, state):
         return state.solved()
 
     def actions(self, node):
-        return filter_actions(self._actions, node.action)
+        return self._moves.next_actions(node)
 
     def apply_action(self, state, action):
         return state.apply(action), 1
@@ -156,24 +167,114 @@ class Group3ToFinalProblem(Problem):
         return max(state.half_turn_distance() / 8, db_lookup)
 
 
+def phase_coordinates():
+    g0 = QUARTER_FACE + HALF_FACE
+    g1 = QUARTER_X + QUARTER_Y + HALF_FACE
+    g2 = QUARTER_X + HALF_FACE
+    g3 = HALF_FACE
+    slices = [[s for s in EDGE_SLOTS if getattr(SLOTS[s], axis) == 0] for axis in "xyz"]
+    return [
+        PhaseCoordinate([OrientationCoordinate("phase1_edge_orientation", EDGE_SLOTS, g0)]),
+        PhaseCoordinate([OrientationCoordinate("phase2_corner_orientation", CORNER_SLOTS, g1),
+                         LocationCoordinate("phase2_slice", slices[0], g1, ordered=False)]),
+        PhaseCoordinate([CosetCoordinate("phase3_corner_tetrad", CORNER_SLOTS, g2, g3),
+                         LocationCoordinate("phase3_slice", slices[1], g2, ordered=False)]),
+        PhaseCoordinate([LocationCoordinate("phase4_corners", CORNER_SLOTS, g3)] +
+                        [LocationCoordinate(f"phase4_{axis}_slice", s, g3) for axis, s in zip("xyz", slices)]),
+    ]
+
+
+class CoordinateProblem(Problem):
+    # Solves one phase on its coordinate instead of on the cube. Coordinate 0 is the goal.
+    def __init__(self, cube, coordinate, heuristic=None):
+        self._initial_state = coordinate.compute(cube)
+        self._coordinate = coordinate
+        self._moves = automaton(coordinate.actions)
+        self._heuristic = heuristic
+
+    def initial_state(self):
+        return self._initial_state
+
+    def goal_test(self, state):
+        return state == 0
+
+    def actions(self, node):
+        return self._moves.next_actions(node)
+
+    def apply_action(self, state, action):
+        return self._coordinate.move(state, action), 1
+
+    def heuristic(self, state):
+        if self._heuristic:
+            return self._heuristic(state)
+        return 0
+
+
+PHASES = [
+    ("Group0To1", lambda c: Group0To1Problem(c.sub_cube(edge))),
+    ("Group1To2", lambda c: Group1To2Problem(c.sub_cube(solved('x', 0) | corner))),
+    ("Group2To3", lambda c: Group2To3Problem(c)),
+    ("Group3ToFinal", lambda c: Group3ToFinalProblem(c.sub_cube(lambda b: b.solved_location.x == 1 or b.solved_location.y == 1 or b.solved_location.z == 1))),
+]
+
+
+def preload():
+    # Opens (or builds) every pattern DB the phases use so later solves only look them up
+    for name, problem in PHASES:
+        problem(Cube(3))
+
+
+def solve(cube, callback=None, callback_freq=100, phase_stats=None, compact=False):
+    # phase_stats, when given a dict, is filled with the SearchStats of each phase by name.
+    # compact searches with search_compact, which keeps far less per state and has no
+    # stats. Returns None when a phase search finds no solution.
+    running = cube
+    total_actions = []
+    for name, problem in PHASES:
+        if phase_stats is not None:
+            states, actions, phase_stats[name] = search(problem(running), callback=callback, callback_freq=callback_freq, with_stats=True)
+        elif compact:
+            states, actions = search_compact(problem(running), callback=callback, callback_freq=callback_freq)
+        else:
+            states, actions = search(problem(running), callback=callback, callback_freq=callback_freq)
+        if actions is None:
+            print(f'No solution found for {name}')
+            return None
+        print(f'Solved step in {len(actions)-1} turns')
+        total_actions = merge_turns(total_actions + actions[1:])
+        running = apply_moves(running, actions[1:])
+    return total_actions
+
+
+
+def distance_tables():
+    return [DistanceTable(f"phase{i + 1}_distance", c) for i, c in enumerate(phase_coordinates())]
+
+
+def solve_with_tables(cube, tables=None):
+    # Table driven solve: every phase is a walk down its exact distance table, so
+    # no search happens and each phase takes as many lookups as it has moves.
+    running = CubieCube.from_cube(cube)
+    total_actions = []
+    for table in tables or distance_tables():
+        actions = table.solve(table.coordinate.compute(running))
+        total_actions = merge_turns(total_actions + actions)
+        running = running.apply_moves(actions)
+    return total_actions
+
 if __name__ == "__main__":
     from plotter import start_plotter
     from time import sleep
     from random import randrange
-    from astar import search
-    from orientationsolver import OrientationProblem
-    from cubesolver import CubeProblem
 
     render = start_plotter()
 
     original = Cube(3)
     turns = 200
 
-    for i in range(turns):
-        original = original.apply(random.choice(QUARTER_FACE))
-        # original = original.apply(random.choice(HALF_FACE))
-
-    total_actions = []
+    scramble = [random.choice(QUARTER_FACE) for i in range(turns)]
+    # scramble = [random.choice(HALF_FACE) for i in range(turns)]
+    original = apply_moves(original, scramble)
 
     def callback(status):
         print(status, end='\r')
@@ -182,34 +283,7 @@ if __name__ == "__main__":
         render(status["state"])
         pass
 
-    running = original
-
-    states, actions = search(Group0To1Problem(running.sub_cube(edge)), callback=callback, callback_freq=100)
-    print(f'Solved step in {len(actions)-1} turns')
-    total_actions.extend(actions[1:])
-    for a in actions[1:]:
-        running = running.apply(a)
-
-    states, actions = search(Group1To2Problem(running.sub_cube(solved('x',0) | corner)), callback=callback, callback_freq=100)
-    print(f'Solved step in {len(actions)-1} turns')
-    total_actions.extend(actions[1:])
-    for a in actions[1:]:
-        running = running.apply(a)
-
-    states, actions = search(Group2To3Problem(running), callback=callback, callback_freq=100)
-
-    print(f'Solved step in {len(actions)-1} turns')
-    total_actions.extend(actions[1:])
-    for a in actions[1:]:
-        running = running.apply(a)
-
-    half_turn_cube = running.sub_cube(lambda b: b.solved_location.x == 1 or b.solved_location.y == 1 or b.solved_location.z == 1)
-    states, actions = search(Group3ToFinalProblem(half_turn_cube), callback=callback, callback_freq=100)
-
-    print(f'Solved step in {len(actions)-1} turns')
-    total_actions.extend(actions[1:])
-    for a in actions[1:]:
-        running = running.apply(a)
+    total_actions = solve(original, callback=callback)
 
     print(f"Full solve in {len(total_actions)} turns")
 
@@ -1,10 +1,12 @@
-from collections import defaultdict
+from array import array
+from collections import Counter, OrderedDict, defaultdict
 from typing import Any
-from indexqueue import IndexedQueue
+from indexqueue import BucketQueue, HeapQueue, IndexedQueue
 from queue import PriorityQueue
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import math
 import random
+import time
 
 @dataclass
 class Node:
@@ -25,6 +27,9 @@ class Node:
 class Problem:
     def initial_state(self):
         pass
+    def goal_state(self):
+        # The single goal state, for problems that have one
+        return None
     def goal_test(self, state):
         return False
     def actions(self, node):
@@ -38,20 +43,159 @@ class Problem:
         return node.path_cost + self.heuristic(node.state)
     def heuristic(self, state):
         return 0
+    def pack_state(self, state):
+        return state
+    def unpack_state(self, packed):
+        return packed
 
 
-def search(problem, callback=None, callback_freq=1_000):
+@dataclass
+class SearchStats:
+    nodes_expanded: int = 0
+    nodes_generated: int = 0
+    # Children already explored, or already in the frontier at no greater cost
+    duplicate_hits: int = 0
+    # Children that lowered the cost of a node already waiting in the frontier
+    reopenings: int = 0
+    peak_frontier: int = 0
+    peak_explored: int = 0
+    heuristic_histogram: Counter = field(default_factory=Counter)
+    heuristic_cache_hits: int = 0
+    heuristic_cache_misses: int = 0
+    # Wall time split by apply_action, heuristic, goal_test and queue. Only
+    # recorded when search is asked for its stats.
+    seconds: defaultdict = field(default_factory=lambda: defaultdict(float))
+
+    def as_dict(self):
+        return {
+            "nodes_expanded": self.nodes_expanded,
+            "nodes_generated": self.nodes_generated,
+            "duplicate_hits": self.duplicate_hits,
+            "reopenings": self.reopenings,
+            "peak_frontier": self.peak_frontier,
+            "peak_explored": self.peak_explored,
+            "heuristic_histogram": {str(h): n for h, n in sorted(self.heuristic_histogram.items())},
+            "heuristic_cache_hits": self.heuristic_cache_hits,
+            "heuristic_cache_misses": self.heuristic_cache_misses,
+            "heuristic_cache_hit_rate": self.heuristic_cache_hit_rate(),
+            "seconds": dict(self.seconds),
+        }
+
+    def heuristic_cache_hit_rate(self):
+        lookups = self.heuristic_cache_hits + self.heuristic_cache_misses
+        return self.heuristic_cache_hits / lookups if lookups else 0
+
+    def __str__(self):
+        timings = ", ".join(f"{k}={v:.3f}s" for k, v in self.seconds.items())
+        return (f"expanded={self.nodes_expanded}, generated={self.nodes_generated}, "
+                f"duplicates={self.duplicate_hits}, reopenings={self.reopenings}, "
+                f"peak_frontier={self.peak_frontier}, peak_explored={self.peak_explored}, "
+                f"heuristic_cache_hit_rate={self.heuristic_cache_hit_rate():.3f}, {timings}")
+
+
+class HeuristicCache:
+    # Memo of heuristic values by state holding at most maxsize states. "lru" evicts
+    # the least recently used state. "clock" keeps a reference bit per slot and
+    # evicts the first unreferenced state the hand reaches, so hits only set a bit.
+    # One cache can be shared by several searches over the same problem.
+    def __init__(self, maxsize=100_000, policy="lru"):
+        if policy not in ("lru", "clock"):
+            raise ValueError(f"Unknown eviction policy {policy}")
+        if maxsize < 1:
+            raise ValueError(f"HeuristicCache needs room for at least one state, got maxsize={maxsize}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.values = OrderedDict()
+        # clock only: states and values by slot, and the slot of each state
+        self.slots = {}
+        self.states = []
+        self.slot_values = []
+        self.referenced = bytearray()
+        self.hand = 0
+
+    def __len__(self):
+        return len(self.values) if self.policy == "lru" else len(self.slots)
+
+    def get(self, state, heuristic):
+        if self.policy == "lru":
+            value = self.values.get(state)
+            if value is not None:
+                self.hits += 1
+                self.values.move_to_end(state)
+                return value
+            self.misses += 1
+            value = heuristic(state)
+            self.values[state] = value
+            if len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+            return value
+
+        slot = self.slots.get(state)
+        if slot is not None:
+            self.hits += 1
+            self.referenced[slot] = 1
+            return self.slot_values[slot]
+        self.misses += 1
+        value = heuristic(state)
+        if len(self.states) < self.maxsize:
+            self.slots[state] = len(self.states)
+            self.states.append(state)
+            self.slot_values.append(value)
+            self.referenced.append(1)
+            return value
+        while self.referenced[self.hand]:
+            self.referenced[self.hand] = 0
+            self.hand = (self.hand + 1) % self.maxsize
+        del self.slots[self.states[self.hand]]
+        self.slots[state] = self.hand
+        self.states[self.hand] = state
+        self.slot_values[self.hand] = value
+        self.referenced[self.hand] = 1
+        self.hand = (self.hand + 1) % self.maxsize
+        return value
+
+
+def _no_clock():
+    return 0
+
+
+def _node_path_cost(node):
+    return node.path_cost
+
+
+def bucket_queue(path_cost=_node_path_cost):
+    # Among nodes of equal cost expand the deepest first. path_cost gives the cost
+    # so far of a queued object, which search_compact replaces for its ids.
+    return BucketQueue(tie_break=path_cost)
+
+
+def search(problem, callback=None, callback_freq=1_000, with_stats=False, queue=IndexedQueue, heuristic_cache=None):
+    # With with_stats the SearchStats are returned as a third value and every
+    # call into the problem and the frontier is timed. queue creates the open
+    # list: IndexedQueue, HeapQueue, or bucket_queue for bounded priorities.
+    # heuristic_cache, a HeuristicCache, memoises problem.heuristic.
+    stats = SearchStats()
+    if heuristic_cache is not None:
+        hits, misses = heuristic_cache.hits, heuristic_cache.misses
+    clock = time.perf_counter if with_stats else _no_clock
+    seconds = stats.seconds
+    histogram = stats.heuristic_histogram
+
+    start = clock()
     node = Node(problem.initial_state(), 0, None, None)
-    frontier = IndexedQueue()
+    frontier = queue()
     frontier.add_or_update(0, node)
     explored = set()
-    action_count = 0
 
     final_node = None
     iteration = 0
     while not frontier.empty():
         iteration += 1
+        t = clock()
         (priority, node) = frontier.pop()
+        seconds["queue"] += clock() - t
 
         if (callback and iteration % callback_freq == 0):
             callback({
@@ -59,22 +203,53 @@ def search(problem, callback=None, callback_freq=1_000):
                 "uniform_cost": node.path_cost,
                 "state": node.state,
                 "explored_nodes": len(explored),
-                "action_count": action_count
+                "action_count": stats.nodes_generated,
+                "stats": stats
             })
 
-        if problem.goal_test(node.state):
+        t = clock()
+        goal = problem.goal_test(node.state)
+        seconds["goal_test"] += clock() - t
+        if goal:
             final_node = node
             break
         explored.add(node)
+        stats.nodes_expanded += 1
 
         for action in problem.actions(node):
+            t = clock()
             child = problem.child(node, action)
-            action_count += 1
-            if not child in explored:
-                existing_node = frontier.get(child)
+            seconds["apply_action"] += clock() - t
+            stats.nodes_generated += 1
+            if child in explored:
+                stats.duplicate_hits += 1
+                continue
+            t = clock()
+            existing_node = frontier.get(child)
+            t2 = clock()
+            if heuristic_cache is None:
                 child_cost = problem.cost(child)
-                if not existing_node or existing_node[0] > child_cost:
-                    frontier.add_or_update(child_cost, child)
+            else:
+                child_cost = child.path_cost + heuristic_cache.get(child.state, problem.heuristic)
+            t3 = clock()
+            seconds["heuristic"] += t3 - t2
+            histogram[child_cost - child.path_cost] += 1
+            if not existing_node or existing_node[0] > child_cost:
+                if existing_node:
+                    stats.reopenings += 1
+                frontier.add_or_update(child_cost, child)
+            else:
+                stats.duplicate_hits += 1
+            seconds["queue"] += (t2 - t) + (clock() - t3)
+        if frontier.size() > stats.peak_frontier:
+            stats.peak_frontier = frontier.size()
+    stats.peak_explored = len(explored)
+    if heuristic_cache is not None:
+        stats.heuristic_cache_hits = heuristic_cache.hits - hits
+        stats.heuristic_cache_misses = heuristic_cache.misses - misses
+    if with_stats:
+        seconds["total"] = clock() - start
+
     if final_node:
         states = []
         actions = []
@@ -87,11 +262,166 @@ def search(problem, callback=None, callback_freq=1_000):
         states.reverse()
         actions.reverse()
         print(f"Explored nodes = {len(explored)}")
-        print(f"Actions taken = {action_count}")
+        print(f"Actions taken = {stats.nodes_generated}")
+        if with_stats:
+            return states, actions, stats
         return states, actions
     else:
+        if with_stats:
+            return None, None, stats
         return None, None
 
+def search_compact(problem, callback=None, callback_freq=1_000, queue=IndexedQueue):
+    # The same search, but instead of Node objects every state gets an integer id
+    # into an interned table of problem.pack_state(state), with its path cost,
+    # parent id and action in parallel arrays. The frontier holds ids, and a
+    # state is only unpacked again when it is expanded.
+    ids = {}
+    packed_states = []
+    path_costs = array("d")
+    parents = array("i")
+    action_ids = array("H")
+    closed = bytearray()
+    action_list = [None]
+    action_index = {}
+
+    def intern(packed, path_cost, parent, action):
+        ids[packed] = len(packed_states)
+        packed_states.append(packed)
+        path_costs.append(path_cost)
+        parents.append(parent)
+        action_ids.append(action)
+        closed.append(0)
+        return len(packed_states) - 1
+
+    def action_id(action):
+        i = action_index.get(action)
+        if i is None:
+            i = action_index[action] = len(action_list)
+            action_list.append(action)
+        return i
+
+    frontier = queue(path_cost=path_costs.__getitem__) if queue is bucket_queue else queue()
+    frontier.add_or_update(0, intern(problem.pack_state(problem.initial_state()), 0, -1, 0))
+    explored_count = 0
+    action_count = 0
+
+    final_id = None
+    iteration = 0
+    while not frontier.empty():
+        iteration += 1
+        (priority, sid) = frontier.pop()
+        node = Node(problem.unpack_state(packed_states[sid]), path_costs[sid], None, action_list[action_ids[sid]])
+
+        if (callback and iteration % callback_freq == 0):
+            callback({
+                "cost": priority,
+                "uniform_cost": node.path_cost,
+                "state": node.state,
+                "explored_nodes": explored_count,
+                "action_count": action_count
+            })
+
+        if problem.goal_test(node.state):
+            final_id = sid
+            break
+        closed[sid] = 1
+        explored_count += 1
+
+        for action in problem.actions(node):
+            child = problem.child(node, action)
+            action_count += 1
+            packed = problem.pack_state(child.state)
+            cid = ids.get(packed)
+            if cid is None:
+                cid = intern(packed, child.path_cost, sid, action_id(action))
+                frontier.add_or_update(problem.cost(child), cid)
+            elif not closed[cid]:
+                child_cost = problem.cost(child)
+                if frontier.get(cid)[0] > child_cost:
+                    path_costs[cid] = child.path_cost
+                    parents[cid] = sid
+                    action_ids[cid] = action_id(action)
+                    frontier.add_or_update(child_cost, cid)
+    if final_id is None:
+        return None, None
+
+    states = []
+    actions = []
+    current = final_id
+    while current != -1:
+        states.append(problem.unpack_state(packed_states[current]))
+        actions.append(action_list[action_ids[current]])
+        current = parents[current]
+    states.reverse()
+    actions.reverse()
+    print(f"Explored nodes = {explored_count}")
+    print(f"Actions taken = {action_count}")
+    return states, actions
+
+def bidirectional_search(problem, callback=None, callback_freq=1_000):
+    # Breadth first from the initial state and from problem.goal_state() at once,
+    # growing the smaller frontier by a whole level each time. Actions must have
+    # unit cost and an inverse. The level in which the frontiers first meet is
+    # finished before stopping so the joined path is a shortest one.
+    start = problem.initial_state()
+    goal = problem.goal_state()
+    # state -> (neighbour it was reached from, action applied to that neighbour, depth)
+    visited = [{start: (None, None, 0)}, {goal: (None, None, 0)}]
+    frontiers = [[start], [goal]]
+    depths = [0, 0]
+    expanded = 0
+
+    best = (0, start) if start == goal else None
+    while best is None and frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        seen, other = visited[side], visited[1 - side]
+        next_frontier = []
+        for state in frontiers[side]:
+            expanded += 1
+            if callback and expanded % callback_freq == 0:
+                callback({
+                    "state": state,
+                    "forward_depth": depths[0],
+                    "backward_depth": depths[1],
+                    "explored_nodes": len(visited[0]) + len(visited[1])
+                })
+            node = Node(state, depths[side], None, seen[state][1])
+            for action in problem.actions(node):
+                child, cost = problem.apply_action(state, action)
+                if child in seen:
+                    continue
+                seen[child] = (state, action, depths[side] + 1)
+                next_frontier.append(child)
+                if child in other:
+                    length = depths[side] + 1 + other[child][2]
+                    if best is None or length < best[0]:
+                        best = (length, child)
+        frontiers[side] = next_frontier
+        depths[side] += 1
+    if best is None:
+        return None, None
+
+    forward, backward = visited
+    states = []
+    actions = []
+    current = best[1]
+    while current is not None:
+        previous, action, depth = forward[current]
+        states.append(current)
+        actions.append(action)
+        current = previous
+    states.reverse()
+    actions.reverse()
+    current = best[1]
+    while backward[current][0] is not None:
+        previous, action, depth = backward[current]
+        states.append(previous)
+        actions.append(action.inverse)
+        current = previous
+    print(f"Explored nodes = {len(forward) + len(backward)}")
+    return states, actions
+
 def iddfs(problem, callback=None, callback_freq=1_000):
     original_node = Node(problem.initial_state(), 0, None, None)
     state_count = 0
@@ -125,6 +455,61 @@ def iddfs(problem, callback=None, callback_freq=1_000):
             return [], [None]+actions # Implement returning states later if needed. Just here to match astar return format.
         max_depth+=1
 
+def ida_star(problem, callback=None, callback_freq=1_000, heuristic_cache=None):
+    # Depth first search bounded by f = g + h, raising the bound to the smallest f
+    # that exceeded it on each iteration. Only the current path is kept in memory.
+    # Every iteration revisits the states of the last, which heuristic_cache can remember.
+    original_node = Node(problem.initial_state(), 0, None, None)
+    state_count = 0
+    path_states = set()
+
+    def recurse(node, bound):
+        nonlocal state_count
+        state_count = state_count + 1
+        if heuristic_cache is None:
+            f = problem.cost(node)
+        else:
+            f = node.path_cost + heuristic_cache.get(node.state, problem.heuristic)
+        if callback and state_count % callback_freq == 0:
+            callback({"cost": f, "uniform_cost": node.path_cost, "state": node.state, "bound": bound})
+
+        if f > bound:
+            return f, None
+        if problem.goal_test(node.state):
+            return f, node
+
+        path_states.add(node.state)
+        next_bound = math.inf
+        for a in problem.actions(node):
+            child = problem.child(node, a)
+            if child.state in path_states:
+                continue
+            t, found = recurse(child, bound)
+            if found:
+                path_states.discard(node.state)
+                return t, found
+            next_bound = min(next_bound, t)
+        path_states.discard(node.state)
+        return next_bound, None
+
+    bound = problem.heuristic(original_node.state)
+    while bound < math.inf:
+        print(f"Working on bound {bound}")
+        bound, final_node = recurse(original_node, bound)
+        if final_node:
+            states = []
+            actions = []
+            current = final_node
+            while current:
+                states.append(current.state)
+                actions.append(current.action)
+                current = current.parent
+            states.reverse()
+            actions.reverse()
+            print(f"Visited nodes = {state_count}")
+            return states, actions
+    return None, None
+
 if __name__ == "__main__":
     # Example of finding shortest path with heuristic of straight line distance
     @dataclass(eq=True, frozen=True)
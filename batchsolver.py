@@ -0,0 +1,194 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any
+from astar import search_compact
+from cubie import CubieCube
+from structs import ACTIONS, Cube
+import Thistlethwaite
+import os
+import random
+import sys
+import time
+
+
+class SolveTimeout(Exception):
+    pass
+
+
+@dataclass
+class SolveResult:
+    index: int
+    actions: Any
+    seconds: float
+    error: Any = None
+
+    def solved(self):
+        return self.error is None
+
+
+@dataclass
+class BatchStats:
+    # latencies is a uniform sample of at most RESERVOIR_SIZE solve times, so
+    # percentiles cost bounded memory however many scrambles stream through
+    RESERVOIR_SIZE = 10_000
+
+    solves: int = 0
+    failures: int = 0
+    elapsed: float = 0
+    latencies: list = field(default_factory=list)
+    recorded: int = 0
+    rng: Any = field(default_factory=lambda: random.Random(0), repr=False)
+
+    def record_latency(self, seconds):
+        self.recorded += 1
+        if len(self.latencies) < BatchStats.RESERVOIR_SIZE:
+            self.latencies.append(seconds)
+        else:
+            i = self.rng.randrange(self.recorded)
+            if i < BatchStats.RESERVOIR_SIZE:
+                self.latencies[i] = seconds
+
+    def solves_per_second(self):
+        return self.solves / self.elapsed if self.elapsed else 0
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def report(self):
+        return {
+            "solves": self.solves,
+            "failures": self.failures,
+            "solves_per_second": self.solves_per_second(),
+            "p50_seconds": self.percentile(50),
+            "p99_seconds": self.percentile(99),
+        }
+
+
+# Per process state of the solvers below, built on first use
+_solvers = {}
+
+
+def thistlethwaite_solver(cube, callback=None):
+    # Compact node storage keeps the larger phases inside a worker's memory
+    return Thistlethwaite.solve(cube, callback=callback, compact=True)
+
+
+def table_solver(cube, callback=None):
+    # Walks exact distance tables without searching, so callback is never called
+    if "tables" not in _solvers:
+        _solvers["tables"] = Thistlethwaite.distance_tables()
+    return Thistlethwaite.solve_with_tables(cube, _solvers["tables"])
+
+
+def kociemba_solver(cube, callback=None, max_length=None, timeout=None):
+    # Bounded by its own budget rather than through callback
+    from kociemba import TwoPhaseSolver
+    if "kociemba" not in _solvers:
+        _solvers["kociemba"] = TwoPhaseSolver()
+    return _solvers["kociemba"].solve(cube, max_length=max_length, timeout=timeout)
+
+
+def korf_solver(cube, callback=None):
+    from cubesolver import CubeProblem
+    states, actions = search_compact(CubeProblem(cube), callback=callback)
+    return actions[1:] if actions is not None else None
+
+
+def _warm_up(solver, quiet=False):
+    # Solving the solved cube loads (or builds) every pattern DB the solver uses
+    if quiet:
+        sys.stdout = sys.stderr
+    solver(CubieCube.from_cube(Cube(3)))
+
+
+def _solve_one(index, cube, solver, timeout):
+    start = time.perf_counter()
+
+    def callback(status):
+        if timeout and time.perf_counter() - start > timeout:
+            raise SolveTimeout()
+
+    try:
+        actions = solver(cube, callback=callback)
+        if actions is None:
+            return SolveResult(index, None, time.perf_counter() - start, "no solution found")
+        return SolveResult(index, [ACTIONS.index(a) for a in actions], time.perf_counter() - start)
+    except SolveTimeout:
+        return SolveResult(index, None, time.perf_counter() - start, "timeout")
+    except Exception as e:
+        # One bad solve must not end the batch
+        return SolveResult(index, None, time.perf_counter() - start, repr(e))
+
+
+def _as_cube(item):
+    if isinstance(item, (Cube, CubieCube)):
+        return CubieCube.from_cube(item)
+    cube = CubieCube.from_cube(Cube(3))
+    for a in item:
+        cube = cube.apply(a)
+    return cube
+
+
+def _record(result, stats, start):
+    if result.solved():
+        result.actions = [ACTIONS[i] for i in result.actions]
+        stats.solves += 1
+    else:
+        stats.failures += 1
+    stats.record_latency(result.seconds)
+    stats.elapsed = time.perf_counter() - start
+    return result
+
+
+def solve_batch(items, solver=thistlethwaite_solver, workers=None, timeout=None, stats=None, quiet=False):
+    # Yields a SolveResult per cube (or sequence of actions scrambling a solved cube)
+    # as each solve finishes. At most two solves per worker are queued at a time so
+    # items is consumed lazily. solver(cube, callback) must be a module level function
+    # and report progress through callback so that timeouts can interrupt it. quiet
+    # sends whatever the workers print to stderr. Items that fail, whether they cannot
+    # be read as a cube or the solver raises, are yielded with an error instead.
+    stats = stats if stats is not None else BatchStats()
+    workers = workers or os.cpu_count()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_warm_up, initargs=(solver, quiet)) as pool:
+        in_flight = {}
+        limit = 2 * workers
+        items = enumerate(items)
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < limit:
+                try:
+                    index, item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                try:
+                    cube = _as_cube(item)
+                except Exception as e:
+                    yield _record(SolveResult(index, None, 0, repr(e)), stats, start)
+                    continue
+                in_flight[pool.submit(_solve_one, index, cube, solver, timeout)] = index
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker itself died, for instance a broken pool
+                    result = SolveResult(index, None, time.perf_counter() - start, repr(e))
+                yield _record(result, stats, start)
+
+
+if __name__ == "__main__":
+    from structs import QUARTER_FACE
+
+    scrambles = ([random.choice(QUARTER_FACE) for i in range(40)] for j in range(20))
+    stats = BatchStats()
+    for result in solve_batch(scrambles, timeout=60, stats=stats):
+        print(result.index, result.error or f"{len(result.actions)} turns", f"{result.seconds:.2f}s")
+    print(stats.report())
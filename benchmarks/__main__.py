@@ -0,0 +1,56 @@
+import argparse
+import json
+import platform
+import sys
+from benchmarks import macro, micro
+
+
+def compare(results, baseline, tolerance):
+    # Names of results that are worse than the baseline by more than tolerance
+    old = {r["name"]: r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        if r["name"] not in old:
+            continue
+        before = old[r["name"]]["value"]
+        if r["better"] == "higher" and r["value"] < before * (1 - tolerance):
+            regressions.append((r["name"], before, r["value"]))
+        if r["better"] == "lower" and r["value"] > before * (1 + tolerance):
+            regressions.append((r["name"], before, r["value"]))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Time move application, DB lookups and searches")
+    parser.add_argument("--suite", choices=["micro", "macro", "all"], default="all")
+    parser.add_argument("--scale", type=int, default=1, help="multiply the amount of work done by every benchmark")
+    parser.add_argument("--output", help="write results as JSON to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression against the baseline")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.suite in ("micro", "all"):
+        results += micro.run_all(args.scale)
+    if args.suite in ("macro", "all"):
+        results += macro.run_all(args.scale)
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "scale": args.scale, "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.6g} -> {after:.6g}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,32 @@
+import random
+from cubie import CubieCube
+from structs import ACTIONS, Cube, filter_actions
+
+# Corpora of increasing difficulty. Scrambles are generated from a fixed seed so
+# every run (and every machine) times the same cubes.
+THISTLETHWAITE_CORPORA = {"easy": 8, "medium": 16, "hard": 40}
+KORF_CORPORA = {"easy": 3, "medium": 5, "hard": 7}
+
+
+def scrambles(length, count, seed=0, actions=ACTIONS):
+    rng = random.Random(f"{seed}-{length}-{count}")
+    result = []
+    for i in range(count):
+        previous = None
+        scramble = []
+        for j in range(length):
+            previous = rng.choice(filter_actions(actions, previous))
+            scramble.append(actions.index(previous))
+        result.append(scramble)
+    return result
+
+
+def scrambled_cubes(length, count, seed=0, actions=ACTIONS, cube=None):
+    start = CubieCube.from_cube(cube or Cube(3))
+    cubes = []
+    for scramble in scrambles(length, count, seed, actions):
+        c = start
+        for i in scramble:
+            c = c.apply(actions[i])
+        cubes.append(c)
+    return cubes
@@ -0,0 +1,95 @@
+import contextlib
+import io
+import time
+from astar import search
+from benchmarks.corpus import KORF_CORPORA, THISTLETHWAITE_CORPORA, scrambled_cubes
+from structs import Cube, QUARTER_FACE, top
+
+
+def latency(name, seconds):
+    ordered = sorted(seconds)
+    return [
+        {"name": f"{name}/p50", "unit": "s", "value": ordered[len(ordered) // 2], "better": "lower"},
+        {"name": f"{name}/max", "unit": "s", "value": ordered[-1], "better": "lower"},
+    ]
+
+
+def thistlethwaite_phases(count):
+    from Thistlethwaite import PHASES, preload
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Build or load every pattern DB before timing
+        preload()
+    for corpus, length in THISTLETHWAITE_CORPORA.items():
+        timings = {name: [] for name, problem in PHASES}
+        moves = []
+        for cube in scrambled_cubes(length, count, seed=4, actions=QUARTER_FACE):
+            running = cube
+            total = 0
+            for name, problem in PHASES:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    states, actions = search(problem(running))
+                    timings[name].append(time.perf_counter() - start)
+                for a in actions[1:]:
+                    running = running.apply(a)
+                total += len(actions) - 1
+            moves.append(total)
+        for name, seconds in timings.items():
+            results += latency(f"thistlethwaite/{corpus}/{name}", seconds)
+        results.append({"name": f"thistlethwaite/{corpus}/moves", "unit": "moves", "value": sum(moves) / len(moves), "better": "lower"})
+    return results
+
+
+def thistlethwaite_tables(count):
+    from Thistlethwaite import distance_tables, solve_with_tables
+    with contextlib.redirect_stdout(io.StringIO()):
+        tables = distance_tables()
+    results = []
+    for corpus, length in THISTLETHWAITE_CORPORA.items():
+        seconds = []
+        moves = []
+        for cube in scrambled_cubes(length, count, seed=4, actions=QUARTER_FACE):
+            start = time.perf_counter()
+            moves.append(len(solve_with_tables(cube, tables)))
+            seconds.append(time.perf_counter() - start)
+        results += latency(f"thistlethwaite_tables/{corpus}", seconds)
+        results.append({"name": f"thistlethwaite_tables/{corpus}/moves", "unit": "moves", "value": sum(moves) / len(moves), "better": "lower"})
+    return results
+
+
+def kociemba(count):
+    from kociemba import TwoPhaseSolver
+    with contextlib.redirect_stdout(io.StringIO()):
+        solver = TwoPhaseSolver()
+    results = []
+    for budget, options in (("first", {}), ("20moves_1s", {"max_length": 20, "timeout": 1})):
+        seconds = []
+        moves = []
+        for cube in scrambled_cubes(40, count, seed=6):
+            start = time.perf_counter()
+            moves.append(len(solver.solve(cube, **options)))
+            seconds.append(time.perf_counter() - start)
+        results += latency(f"kociemba/{budget}", seconds)
+        results.append({"name": f"kociemba/{budget}/moves", "unit": "moves", "value": sum(moves) / len(moves), "better": "lower"})
+    return results
+
+
+def korf(count):
+    from cubesolver import CubeProblem, preload
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        preload()
+    for corpus, length in KORF_CORPORA.items():
+        seconds = []
+        for cube in scrambled_cubes(length, count, seed=5, cube=Cube(3).sub_cube(top)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                search(CubeProblem(cube))
+                seconds.append(time.perf_counter() - start)
+        results += latency(f"korf/{corpus}", seconds)
+    return results
+
+
+def run_all(scale=1):
+    return thistlethwaite_phases(3 * scale) + thistlethwaite_tables(20 * scale) + kociemba(3 * scale) + korf(3 * scale)
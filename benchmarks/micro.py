@@ -0,0 +1,145 @@
+import time
+from astar import Node
+from benchmarks.corpus import scrambled_cubes, scrambles
+from canonical import automaton
+from cubie import CubieCube, apply_moves
+from indexqueue import BucketQueue, HeapQueue, IndexedQueue
+from nxn import FaceletCube, moves
+from structs import ACTIONS, Cube, edge, filter_actions, top
+
+
+def best_rate(operation, count, repeat=3, setup=lambda: None):
+    # Operations per second of the fastest of repeat runs. setup runs untimed
+    # before each run and its result is passed to operation.
+    best = None
+    for i in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        operation(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def throughput(name, rate):
+    return {"name": name, "unit": "ops/s", "value": rate, "better": "higher"}
+
+
+def cube_apply(count):
+    moves = [ACTIONS[i] for s in scrambles(count, 1, seed=1) for i in s]
+    results = []
+    for label, start in (("Cube", Cube(3)), ("CubieCube", CubieCube.from_cube(Cube(3)))):
+        def run(arg):
+            cube = start
+            for a in moves:
+                cube = cube.apply(a)
+        results.append(throughput(f"apply/{label}", best_rate(run, count)))
+    return results
+
+
+def sequence_apply(count):
+    # Whole 200 move scrambles, move by move and as one compiled table
+    sequences = [[ACTIONS[i] for i in s] for s in scrambles(200, 10, seed=2)]
+    start = Cube(3)
+
+    def run(arg):
+        for i in range(count):
+            cube = start
+            for a in sequences[i % len(sequences)]:
+                cube = cube.apply(a)
+
+    def run_compiled(arg):
+        for i in range(count):
+            apply_moves(start, sequences[i % len(sequences)])
+    return [throughput("apply/200 moves", best_rate(run, count)),
+            throughput("apply/200 moves compiled", best_rate(run_compiled, count))]
+
+
+def nxn_apply(count):
+    # Layer turns per second as the cube grows from 2x2 to 7x7
+    results = []
+    for size in range(2, 8):
+        all_moves = moves(size)
+        sequence = [all_moves[(i * 7) % len(all_moves)] for i in range(count)]
+
+        def run(arg):
+            cube = FaceletCube(size)
+            for m in sequence:
+                cube = cube.apply(m)
+        results.append(throughput(f"apply/FaceletCube{size}", best_rate(run, count)))
+    return results
+
+
+def cube_hash(count):
+    results = []
+    cubies = scrambled_cubes(12, count, seed=2)
+    for label, make in (("Cube", lambda c: c.to_cube()), ("CubieCube", lambda c: CubieCube(c.pieces, c.codes))):
+        def run(cubes):
+            for cube in cubes:
+                hash(cube)
+        # Hashes are cached per instance so every run hashes fresh copies
+        results.append(throughput(f"hash/{label}", best_rate(run, count, setup=lambda: [make(c) for c in cubies])))
+    return results
+
+
+def pattern_db_lookup(count):
+    from patterndb import build_db
+    model_cube = Cube(3).sub_cube(top)
+    dbs = {
+        "korfedge": build_db("korfedge", model_cube.sub_cube(edge), 6, ACTIONS, pattern_db_options={"ranked": True}),
+        "korffull": build_db("korffull", model_cube, 6, ACTIONS),
+    }
+    results = []
+    cubies = scrambled_cubes(6, count, seed=3, cube=model_cube)
+    cubes = [c.to_cube() for c in cubies]
+    for name, db in dbs.items():
+        for label, states in (("Cube", cubes), ("CubieCube", cubies)):
+            def run(arg):
+                for s in states:
+                    db.get_from_cube(s)
+            results.append(throughput(f"get_from_cube/{name}/{label}", best_rate(run, count)))
+    return results
+
+
+def queue_operations(count):
+    keys = [(i * 7919) % count for i in range(count)]
+
+    results = []
+    for queue in (IndexedQueue, HeapQueue, BucketQueue):
+        def run(arg):
+            q = queue()
+            for k in keys:
+                q.add_or_update(k % 97, k)
+            while not q.empty():
+                q.pop()
+        results.append(throughput(f"{queue.__name__}/push+pop", best_rate(run, count)))
+    return results
+
+
+def filter_actions_rate(count):
+    previous = [ACTIONS[i % len(ACTIONS)] for i in range(count)]
+
+    def run(arg):
+        for p in previous:
+            filter_actions(ACTIONS, p)
+    moves = automaton(ACTIONS)
+    nodes = [Node(None, 0, None, p) for p in previous]
+
+    def run_automaton(arg):
+        for n in nodes:
+            n.move_state = None
+            moves.next_actions(n)
+    return [throughput("filter_actions", best_rate(run, count)),
+            throughput("MoveAutomaton.next_actions", best_rate(run_automaton, count))]
+
+
+def run_all(scale=1):
+    results = []
+    results += cube_apply(20_000 * scale)
+    results += sequence_apply(100 * scale)
+    results += nxn_apply(20_000 * scale)
+    results += cube_hash(5_000 * scale)
+    results += pattern_db_lookup(2_000 * scale)
+    results += queue_operations(20_000 * scale)
+    results += filter_actions_rate(50_000 * scale)
+    return results
@@ -0,0 +1,120 @@
+from cubie import SLOTS, move_table
+
+# Finite automaton accepting only canonical move sequences over an action set.
+# Turns about one axis commute, so inside a run of turns about the same axis the
+# faces must strictly increase, except that a face may be turned again while
+# the total turn of that face is not the identity and no single action equals
+# it. Any other sequence has an equal or shorter canonical one.
+
+
+def _signature(table):
+    return tuple(table[s * 3] for s in range(len(SLOTS))) + tuple(table[s * 3 + 1] for s in range(len(SLOTS)))
+
+
+def _compose(first, second):
+    return [second[c] for c in first]
+
+
+class MoveAutomaton:
+    START = 0
+
+    def __init__(self, actions):
+        self.actions = actions
+        tables = [move_table(a) for a in actions]
+        identity = _signature(list(range(len(SLOTS) * 3)))
+        single = set(_signature(t) for t in tables)
+
+        # Faces are numbered in order of first appearance within each axis
+        faces = []
+        face = []
+        for a, table in zip(actions, tables):
+            moved = (a.axis, frozenset(s for s in range(len(SLOTS)) if table[s * 3] != s * 3))
+            if moved not in faces:
+                faces.append(moved)
+            face.append(faces.index(moved))
+
+        # A state is the face of the current run's last turn, its axis and that
+        # face's total turn so far, or None at the start.
+        states = [None]
+        index = {None: 0}
+        self.transitions = []
+        i = 0
+        while i < len(states):
+            state = states[i]
+            row = []
+            for f, a, table in zip(face, actions, tables):
+                if state is None or a.axis != state[1] or f > state[0]:
+                    child = (f, a.axis, table)
+                elif f == state[0]:
+                    total = _compose(state[2], table)
+                    signature = _signature(total)
+                    if signature == identity or signature in single:
+                        row.append(-1)
+                        continue
+                    child = (f, a.axis, total)
+                else:
+                    row.append(-1)
+                    continue
+                key = (child[0], child[1], _signature(child[2]))
+                if key not in index:
+                    index[key] = len(states)
+                    states.append(child)
+                row.append(index[key])
+            self.transitions.append(row)
+            i += 1
+
+        self.action_index = {a: i for i, a in enumerate(actions)}
+        self.allowed = [[a for a, t in zip(actions, row) if t >= 0] for row in self.transitions]
+
+    def next(self, state, action):
+        # -1 when action would make the sequence non canonical
+        return self.transitions[state][self.action_index[action]]
+
+    def node_state(self, node):
+        # The state after the moves leading to node, cached on the node. Nodes whose
+        # parent is missing, as in astar.search_compact, only remember their last move.
+        state = getattr(node, "move_state", None)
+        if state is None:
+            if node.action is None:
+                state = MoveAutomaton.START
+            elif node.parent is None:
+                state = self.next(MoveAutomaton.START, node.action)
+            else:
+                state = self.next(self.node_state(node.parent), node.action)
+                if state < 0:
+                    state = self.next(MoveAutomaton.START, node.action)
+            node.move_state = state
+        return state
+
+    def next_actions(self, node):
+        return self.allowed[self.node_state(node)]
+
+    def count_sequences(self, length):
+        counts = {MoveAutomaton.START: 1}
+        for i in range(length):
+            next_counts = {}
+            for state, n in counts.items():
+                for t in self.transitions[state]:
+                    if t >= 0:
+                        next_counts[t] = next_counts.get(t, 0) + n
+            counts = next_counts
+        return sum(counts.values())
+
+
+_automata = {}
+
+
+def automaton(actions):
+    key = tuple(a.id() for a in actions)
+    if key not in _automata:
+        _automata[key] = MoveAutomaton(actions)
+    return _automata[key]
+
+
+if __name__ == "__main__":
+    from structs import ACTIONS, HALF_FACE, QUARTER_FACE, QUARTER_X, QUARTER_Y
+
+    for name, actions in (("ACTIONS", ACTIONS), ("G1", QUARTER_X + QUARTER_Y + HALF_FACE), ("HALF_FACE", HALF_FACE), ("QUARTER_FACE", QUARTER_FACE)):
+        a = automaton(actions)
+        counts = [a.count_sequences(n) for n in range(1, 8)]
+        print(name, len(a.transitions), "states", counts, f"branching {counts[-1] / counts[-2]:.2f}")
@@ -0,0 +1,84 @@
+import argparse
+import json
+import sys
+from contextlib import ExitStack, redirect_stdout
+from functools import partial
+from batchsolver import BatchStats, kociemba_solver, korf_solver, solve_batch, table_solver, thistlethwaite_solver
+from notation import format_moves, parse_moves
+
+SOLVERS = {
+    "thistlethwaite": thistlethwaite_solver,
+    "tables": table_solver,
+    "kociemba": kociemba_solver,
+    "korf": korf_solver,
+}
+
+
+def read_scrambles(lines, pending, emit):
+    # Yields the moves of each scramble line, one at a time. pending maps the position
+    # of every yielded scramble, the index solve_batch gives it, to its line number
+    # and text until the result is written. Blank lines and # comments are skipped
+    # and unparsable lines reported at once.
+    index = 0
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text or text.startswith("#"):
+            continue
+        try:
+            actions = parse_moves(text)
+        except ValueError as e:
+            emit({"line": number, "scramble": text, "error": str(e)})
+            continue
+        pending[index] = (number, text)
+        index += 1
+        yield actions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python cli.py", description="Solve scrambles written in move notation, one per line, and write a JSON line per solve")
+    parser.add_argument("input", nargs="?", default="-", help="file of scrambles, - or nothing for stdin")
+    parser.add_argument("--solver", choices=list(SOLVERS), default="tables")
+    parser.add_argument("--workers", type=int, help="solver processes, defaults to the number of CPUs")
+    parser.add_argument("--timeout", type=float, help="seconds before a solve is given up (kociemba: returns its best so far; not for tables)")
+    parser.add_argument("--max-length", type=int, help="kociemba: stop at the first solution this short, needs --timeout")
+    parser.add_argument("--output", help="write results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    solver = SOLVERS[args.solver]
+    timeout = args.timeout
+    if args.solver == "tables" and timeout is not None:
+        parser.error("--timeout has no effect on the tables solver, which never searches")
+    if args.solver == "kociemba":
+        if args.max_length is not None and timeout is None:
+            parser.error("--max-length needs --timeout with the kociemba solver to bound each solve")
+        # kociemba keeps its best solution when the time runs out instead of failing
+        solver = partial(kociemba_solver, max_length=args.max_length, timeout=timeout)
+        timeout = None
+
+    with ExitStack() as stack:
+        out = stack.enter_context(open(args.output, "w")) if args.output else sys.stdout
+        lines = sys.stdin if args.input == "-" else stack.enter_context(open(args.input))
+        # Anything else printed, such as pattern DB build progress, goes to stderr
+        stack.enter_context(redirect_stdout(sys.stderr))
+
+        def emit(record):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+        pending = {}
+        stats = BatchStats()
+        scrambles = read_scrambles(lines, pending, emit)
+        for result in solve_batch(scrambles, solver, workers=args.workers, timeout=timeout, stats=stats, quiet=True):
+            number, text = pending.pop(result.index)
+            record = {"line": number, "scramble": text, "seconds": round(result.seconds, 6)}
+            if result.solved():
+                record["solution"] = format_moves(result.actions)
+                record["moves"] = len(result.actions)
+            else:
+                record["error"] = result.error
+            emit(record)
+        print(json.dumps(stats.report()), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,225 @@
+from array import array
+from cubie import SLOTS, CubieCube, move_table
+from structs import ACTIONS
+import os
+import pickle
+
+
+class Coordinate:
+    # Numbers every value of key() reachable from the solved cube under actions in
+    # breadth first order, so the solved cube is always 0. key() must only depend
+    # on where things are, not on which moves led there, for the move table to be valid.
+    def __init__(self, name, pieces, actions):
+        self.name = name
+        self.pieces = pieces
+        self.actions = actions
+        self.action_index = {a: i for i, a in enumerate(actions)}
+
+        filepath = f"dbs/{name}.coord"
+        action_ids = [ACTIONS.index(a) for a in actions]
+        try:
+            data = pickle.load(open(filepath, "rb"))
+            if data["actions"] != action_ids or data["pieces"] != list(pieces):
+                raise ValueError(f"{filepath} was built for a different coordinate")
+            self.keys = data["keys"]
+            self.table = data["table"]
+        except:
+            print(f"[{name}]: Building move table")
+            self._build()
+            os.makedirs("dbs", exist_ok=True)
+            pickle.dump({"actions": action_ids, "pieces": list(pieces), "keys": self.keys, "table": self.table}, open(filepath, "wb"))
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        self.size = len(self.keys)
+
+    def key(self, codes):
+        pass
+
+    def _build(self):
+        move_tables = [move_table(a) for a in self.actions]
+        start = tuple(p * 3 for p in self.pieces)
+        index = {self.key(start): 0}
+        frontier = [start]
+        self.table = [array('i') for a in self.actions]
+
+        i = 0
+        while i < len(frontier):
+            codes = frontier[i]
+            for row, t in zip(self.table, move_tables):
+                child = tuple([t[c] for c in codes])
+                k = self.key(child)
+                value = index.get(k)
+                if value is None:
+                    value = len(index)
+                    index[k] = value
+                    frontier.append(child)
+                row.append(value)
+            i += 1
+        self.keys = list(index)
+
+    def compute(self, cube):
+        cube = CubieCube.from_cube(cube)
+        codes = dict(zip(cube.pieces, cube.codes))
+        try:
+            return self.index[self.key(tuple(codes[p] for p in self.pieces))]
+        except KeyError:
+            raise ValueError(f"[{self.name}]: cube is missing pieces or is outside of the coordinate's group")
+
+    def move(self, value, action):
+        return self.table[self.action_index[action]][value]
+
+
+class OrientationCoordinate(Coordinate):
+    # Twist of whichever piece sits in each of the slots
+    def __init__(self, name, slots, actions):
+        self.slot_position = {s: i for i, s in enumerate(slots)}
+        super().__init__(name, slots, actions)
+
+    def key(self, codes):
+        twists = [0] * len(codes)
+        for c in codes:
+            twists[self.slot_position[c // 3]] = c % 3
+        return tuple(twists)
+
+
+class LocationCoordinate(Coordinate):
+    # Locations of the pieces, or only the set of locations they fill when not ordered
+    def __init__(self, name, pieces, actions, ordered=True):
+        self.ordered = ordered
+        super().__init__(name, pieces, actions)
+
+    def key(self, codes):
+        locations = tuple([c // 3 for c in codes])
+        return locations if self.ordered else tuple(sorted(locations))
+
+
+class CosetCoordinate(Coordinate):
+    # Permutation of the pieces up to the subgroup generated by subgroup_actions.
+    # A permutation p and p * h for any h in the subgroup share a key, and the key
+    # of the solved cube is the subgroup itself.
+    def __init__(self, name, pieces, actions, subgroup_actions):
+        position = {s: i for i, s in enumerate(pieces)}
+        subgroup = LocationCoordinate(f"{name}_subgroup", pieces, subgroup_actions)
+        self.subgroup = [tuple(position[l] for l in k) for k in subgroup.keys]
+        super().__init__(name, pieces, actions)
+
+    def key(self, codes):
+        locations = [c // 3 for c in codes]
+        return min(tuple([locations[i] for i in h]) for h in self.subgroup)
+
+
+class PhaseCoordinate:
+    # Mixed radix combination of coordinates sharing one action set
+    def __init__(self, coordinates):
+        self.coordinates = coordinates
+        self.actions = coordinates[0].actions
+        self.size = 1
+        for c in coordinates:
+            self.size *= c.size
+        self._rows = {a: [c.table[c.action_index[a]] for c in coordinates] for a in self.actions}
+        self._radix = [c.size for c in coordinates]
+
+    def compute(self, cube):
+        value = 0
+        for c in self.coordinates:
+            value = value * c.size + c.compute(cube)
+        return value
+
+    def split(self, value):
+        parts = []
+        for r in reversed(self._radix):
+            value, part = divmod(value, r)
+            parts.append(part)
+        parts.reverse()
+        return parts
+
+    def move(self, value, action):
+        result = 0
+        for row, r, part in zip(self._rows[action], self._radix, self.split(value)):
+            result = result * r + row[part]
+        return result
+
+
+class DistanceTable:
+    # Exact number of moves from every value of a phase coordinate to its goal,
+    # value 0, found by breadth first search over the coordinate's move tables.
+    # The action sets are closed under inverses so distances from the goal are
+    # also distances to it.
+    UNREACHED = 255
+
+    def __init__(self, name, coordinate):
+        self.name = name
+        self.coordinate = coordinate
+
+        filepath = f"dbs/{name}.dist"
+        action_ids = [ACTIONS.index(a) for a in coordinate.actions]
+        try:
+            data = pickle.load(open(filepath, "rb"))
+            if data["actions"] != action_ids or data["size"] != coordinate.size:
+                raise ValueError(f"{filepath} was built for a different coordinate")
+            self.table = data["table"]
+        except:
+            print(f"[{name}]: Building distance table")
+            self._build()
+            os.makedirs("dbs", exist_ok=True)
+            pickle.dump({"actions": action_ids, "size": coordinate.size, "table": self.table}, open(filepath, "wb"))
+
+    def _build(self):
+        c = self.coordinate
+        table = bytearray([DistanceTable.UNREACHED]) * c.size
+        table[0] = 0
+        rows = [c._rows[a] for a in c.actions]
+        frontier = [0]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for value in frontier:
+                parts = c.split(value)
+                for row in rows:
+                    child = 0
+                    for t, r, part in zip(row, c._radix, parts):
+                        child = child * r + t[part]
+                    if table[child] == DistanceTable.UNREACHED:
+                        table[child] = depth
+                        next_frontier.append(child)
+            frontier = next_frontier
+        self.table = table
+
+    def distance(self, value):
+        return self.table[value]
+
+    def solve(self, value):
+        # Greedy descent: some action always leads one move closer to the goal
+        distance = self.table[value]
+        if distance == DistanceTable.UNREACHED:
+            raise ValueError(f"[{self.name}]: value {value} cannot reach the goal")
+        actions = []
+        while distance > 0:
+            for a in self.coordinate.actions:
+                child = self.coordinate.move(value, a)
+                if self.table[child] == distance - 1:
+                    actions.append(a)
+                    value = child
+                    distance -= 1
+                    break
+        return actions
+
+
+if __name__ == "__main__":
+    import random
+    from structs import Cube, QUARTER_X, QUARTER_Y, HALF_FACE
+    from cubie import EDGE_SLOTS, CORNER_SLOTS
+
+    co = OrientationCoordinate("test_co", CORNER_SLOTS, QUARTER_X + QUARTER_Y + HALF_FACE)
+    x_slice = [s for s in EDGE_SLOTS if SLOTS[s].x == 0]
+    phase = PhaseCoordinate([co, LocationCoordinate("test_slice", x_slice, co.actions, ordered=False)])
+    print("phase size", phase.size)
+
+    cube = Cube(3)
+    value = phase.compute(cube)
+    for i in range(100):
+        a = random.choice(phase.actions)
+        cube = cube.apply(a)
+        value = phase.move(value, a)
+        assert value == phase.compute(cube)
+    print("move table agrees with cube model")
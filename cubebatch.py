@@ -0,0 +1,97 @@
+import numpy as np
+from cubie import CORNER_SLOTS, SLOTS, CubieCube, move_table
+from structs import ACTIONS, Cube
+
+# Slot indexed form of the cubie model: perm[slot] is the piece in the slot and
+# orient[slot] its twist. Applying ACTIONS[m] moves the piece in MOVE_SOURCE[m][j]
+# into slot j and adds MOVE_TWIST[m][j] to its twist.
+MODULUS = np.array([3 if s in CORNER_SLOTS else 2 for s in range(len(SLOTS))], dtype=np.int8)
+MOVE_SOURCE = np.zeros((len(ACTIONS), len(SLOTS)), dtype=np.intp)
+MOVE_TWIST = np.zeros((len(ACTIONS), len(SLOTS)), dtype=np.int8)
+for m, a in enumerate(ACTIONS):
+    table = move_table(a)
+    for slot in range(len(SLOTS)):
+        target, twist = divmod(table[slot * 3], 3)
+        MOVE_SOURCE[m, target] = slot
+        MOVE_TWIST[m, target] = twist
+
+
+class CubeBatch:
+    def __init__(self, perm, orient):
+        self.perm = perm
+        self.orient = orient
+
+    @staticmethod
+    def identity(n):
+        perm = np.tile(np.arange(len(SLOTS), dtype=np.int8), (n, 1))
+        return CubeBatch(perm, np.zeros((n, len(SLOTS)), dtype=np.int8))
+
+    @staticmethod
+    def from_cubes(cubes):
+        perm = np.zeros((len(cubes), len(SLOTS)), dtype=np.int8)
+        orient = np.zeros((len(cubes), len(SLOTS)), dtype=np.int8)
+        for n, cube in enumerate(cubes):
+            cube = CubieCube.from_cube(cube)
+            if len(cube.pieces) != len(SLOTS):
+                raise ValueError("CubeBatch needs every corner and edge of the cube")
+            for p, c in zip(cube.pieces, cube.codes):
+                perm[n, c // 3] = p
+                orient[n, c // 3] = c % 3
+        return CubeBatch(perm, orient)
+
+    def to_cubes(self):
+        decor = Cube(3).decorative_blocks
+        cubes = []
+        for perm, orient in zip(self.perm.tolist(), self.orient.tolist()):
+            codes = [0] * len(SLOTS)
+            for slot, (p, t) in enumerate(zip(perm, orient)):
+                codes[p] = slot * 3 + t
+            cubes.append(CubieCube(tuple(range(len(SLOTS))), tuple(codes), decor))
+        return cubes
+
+    def __len__(self):
+        return len(self.perm)
+
+    def apply(self, moves):
+        # moves is an index into ACTIONS applied to every cube, or one index per cube
+        moves = np.asarray(moves)
+        if moves.ndim == 0:
+            source = MOVE_SOURCE[moves]
+            return CubeBatch(self.perm[:, source], (self.orient[:, source] + MOVE_TWIST[moves]) % MODULUS)
+        source = MOVE_SOURCE[moves]
+        perm = np.take_along_axis(self.perm, source, axis=1)
+        orient = (np.take_along_axis(self.orient, source, axis=1) + MOVE_TWIST[moves]) % MODULUS
+        return CubeBatch(perm, orient)
+
+    def apply_sequence(self, moves):
+        # moves is a list of ACTIONS indices for every cube, or an (N, length) array
+        moves = np.asarray(moves)
+        batch = self
+        for column in (moves if moves.ndim == 1 else moves.T):
+            batch = batch.apply(column)
+        return batch
+
+    def solved(self):
+        return (self.perm == np.arange(len(SLOTS))).all(axis=1) & (self.orient == 0).all(axis=1)
+
+
+def action_indices(actions):
+    return [ACTIONS.index(a) for a in actions]
+
+
+if __name__ == "__main__":
+    import timeit
+
+    n = 1_000_000
+    length = 20
+    rng = np.random.default_rng(0)
+    scrambles = rng.integers(len(ACTIONS), size=(n, length))
+    inverses = np.array(action_indices([a.inverse for a in ACTIONS]))
+
+    start = timeit.default_timer()
+    batch = CubeBatch.identity(n).apply_sequence(scrambles)
+    end = timeit.default_timer()
+    print(f'Actions per second {n * length / (end - start)}')
+
+    undone = batch.apply_sequence(inverses[scrambles[:, ::-1]])
+    print(f'Solved after undoing scrambles: {undone.solved().sum()} of {n}')
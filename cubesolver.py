@@ -1,32 +1,45 @@
 from patterndb import build_db
+from canonical import automaton
+from cubie import PackedCubeStates, solved_like
 from structs import *
+from symmetry import preserving_axes
 from astar import * 
 
-class CubeProblem(Problem):
+class CubeProblem(PackedCubeStates, Problem):
     def __init__(self, cube, actions=ACTIONS):
         self._initial_state = cube
         self._actions = actions
+        self._moves = automaton(self._actions)
 
         model_cube = Cube(3).sub_cube(top)
         edge_cube = model_cube.sub_cube(edge)
         corner_cube = model_cube.sub_cube(corner)
         pair_cube = model_cube.sub_cube(lambda b: b.solved_location.x == 1 and b.solved_location.y != -1)
-        self._dbs = [build_db("korfedge", edge_cube, 6, ACTIONS),
-                     build_db("korfcorner", corner_cube, 6, ACTIONS),
-                     build_db("korffull", model_cube, 6, ACTIONS),
-                     build_db("korfpair", pair_cube, 7, ACTIONS)]
+        ranked = {"ranked": True}
+        # The top layer looks the same under every symmetry keeping the z axis, so
+        # those DBs store one entry per symmetry class
+        symmetric = {"symmetries": preserving_axes("z")}
+        self._dbs = [build_db("korfedge", edge_cube, 6, ACTIONS, pattern_db_options={**ranked, **symmetric}),
+                     build_db("korfcorner", corner_cube, 6, ACTIONS, pattern_db_options={**ranked, **symmetric}),
+                     build_db("korffull", model_cube, 6, ACTIONS, pattern_db_options=symmetric),
+                     build_db("korfpair", pair_cube, 7, ACTIONS, pattern_db_options=ranked)]
     def initial_state(self):
         return self._initial_state
+    def goal_state(self):
+        return solved_like(self._initial_state)
     def goal_test(self, state):
         return state.solved()
     def actions(self, node):
-        return filter_actions(self._actions, node.action)
+        return self._moves.next_actions(node)
     def apply_action(self, state, action):
         return state.apply(action), 1
     def heuristic(self, state):
         db_lookup = max([db.get_from_cube(state) for db in self._dbs])
         return max(state.turn_distance() / 8, db_lookup)
 
+def preload():
+    CubeProblem(Cube(3).sub_cube(top))
+
 if __name__ == "__main__":
     from plotter import start_plotter
     from time import sleep
@@ -51,11 +64,9 @@ if __name__ == "__main__":
         print(status)
         render(status["state"])    
 
-    # import cProfile
-    # with cProfile.Profile() as pr:
     p = CubeProblem(cube)
-    states, actions = search(p, callback=callback, callback_freq=100)
-    # pr.print_stats()
+    states, actions, stats = search(p, callback=callback, callback_freq=100, with_stats=True)
+    print(stats)
 
 
     print(f'Solved in {len(actions)-1} turns')
@@ -0,0 +1,269 @@
+from structs import ACTIONS, Block, Cube, Matrix, Vector
+
+# Alternative state backend for the 3x3 cube. Every piece is stored as a single
+# integer code = location * 3 + twist, where location indexes SLOTS and twist is
+# the corner twist (0-2) or edge flip (0-1) of the piece in that location. A
+# CubieCube is therefore a permutation array and an orientation array packed
+# together, and an action is a 60 entry lookup table over codes.
+
+SLOTS = [b.solved_location for b in Cube(3).blocks]
+SLOT_INDEX = {s: i for i, s in enumerate(SLOTS)}
+CORNER_SLOTS = [i for i, s in enumerate(SLOTS) if s.x != 0 and s.y != 0 and s.z != 0]
+EDGE_SLOTS = [i for i, s in enumerate(SLOTS) if i not in CORNER_SLOTS]
+CODE_COUNT = len(SLOTS) * 3
+
+# Edges are flipped by quarter turns of the axis in the middle of this priority
+# list, which makes z quarter turns the "bad" moves of the Thistlethwaite phases.
+EDGE_AXIS_PRIORITY = [0, 2, 1]
+
+
+def is_corner_slot(slot):
+    s = SLOTS[slot]
+    return s.x != 0 and s.y != 0 and s.z != 0
+
+
+def _axis(v):
+    return [abs(m) for m in v].index(1)
+
+
+def _primary_axis(location):
+    coords = tuple(location)
+    for axis in EDGE_AXIS_PRIORITY:
+        if coords[axis] != 0:
+            return axis
+
+
+def twist(solved_location, actual_location, orientations):
+    o = orientations
+    if solved_location.x != 0 and solved_location.y != 0 and solved_location.z != 0:
+        # Axis the x sticker of the corner faces, counted clockwise around the corner
+        d = _axis(o[0])
+        l = actual_location
+        return d if l.x * l.y * l.z > 0 else (-d) % 3
+    sticker = [o[0], o[1], o[0].cross(o[1])][_primary_axis(solved_location)]
+    return int(_axis(sticker) != _primary_axis(actual_location))
+
+
+def encode(block):
+    return SLOT_INDEX[block.actual_location] * 3 + twist(block.solved_location, block.actual_location, block.orientations)
+
+
+def _rotations():
+    start = (Vector(1, 0, 0), Vector(0, 1, 0))
+    found = [start]
+    i = 0
+    while i < len(found):
+        o = found[i]
+        for r in (Vector.rotateX, Vector.rotateY, Vector.rotateZ):
+            n = (r(o[0]), r(o[1]))
+            if n not in found:
+                found.append(n)
+        i += 1
+    return found
+
+
+ROTATIONS = _rotations()
+
+# ORIENTATIONS[piece][code] is the orientation list of a piece sitting at code
+ORIENTATIONS = []
+for s in SLOTS:
+    by_code = {}
+    for o in ROTATIONS:
+        l = Matrix.rotor(*o) * s
+        by_code[SLOT_INDEX[l] * 3 + twist(s, l, o)] = [o[0], o[1]]
+    by_code[SLOT_INDEX[s] * 3] = Block.initial_orientations
+    ORIENTATIONS.append(by_code)
+
+
+def move_table(action):
+    if not hasattr(action, '_cubie_table'):
+        table = list(range(CODE_COUNT))
+        for slot, s in enumerate(SLOTS):
+            for code, o in ORIENTATIONS[slot].items():
+                if code // 3 == slot:
+                    table[code] = encode(Block(s, s, o).apply(action))
+        action._cubie_table = table
+    return action._cubie_table
+
+
+# Compiled move sequences: the code tables of the moves composed into one, so a
+# whole sequence is applied with a single gather. Oldest entries go first once
+# the cache is full.
+COMPILED_CACHE_SIZE = 4096
+_compiled = {}
+
+
+def compile_moves(actions):
+    key = tuple(a.id() for a in actions)
+    table = _compiled.get(key)
+    if table is None:
+        table = list(range(CODE_COUNT))
+        for a in actions:
+            move = move_table(a)
+            table = [move[c] for c in table]
+        if len(_compiled) >= COMPILED_CACHE_SIZE:
+            del _compiled[next(iter(_compiled))]
+        _compiled[key] = table
+    return table
+
+
+def _face(action):
+    table = move_table(action)
+    return frozenset(s for s in range(len(SLOTS)) if table[s * 3] != s * 3)
+
+
+def merge_turns(actions):
+    # Joins adjacent turns of the same face, as where two solution phases meet:
+    # R R2 becomes R' and U U' disappears. The result is an equal shorter sequence.
+    single = {tuple(move_table(a)): a for a in ACTIONS}
+    identity = tuple(range(CODE_COUNT))
+    merged = []
+    for a in actions:
+        if merged and _face(merged[-1]) == _face(a):
+            first = move_table(merged.pop())
+            table = tuple(move_table(a)[c] for c in first)
+            if table != identity:
+                merged.append(single[table])
+        else:
+            merged.append(a)
+    return merged
+
+
+def solved_like(cube):
+    # The solved state of the pieces of cube, in the same representation
+    if isinstance(cube, CubieCube):
+        return CubieCube(cube.pieces, tuple(p * 3 for p in cube.pieces), cube.decorative_blocks)
+    return Cube(3).sub_cube_from_cube(cube)
+
+
+def apply_moves(cube, actions):
+    # Applies a move sequence to a Cube or CubieCube, returning the same kind
+    if isinstance(cube, CubieCube):
+        return cube.apply_moves(actions)
+    return CubieCube.from_cube(cube).apply_moves(actions).to_cube()
+
+
+_BLOCKS = {}
+
+
+def block(piece, code):
+    key = piece * CODE_COUNT + code
+    b = _BLOCKS.get(key)
+    if b is None:
+        b = Block(SLOTS[piece], SLOTS[code // 3], ORIENTATIONS[piece][code])
+        b.turn_distance_value = b.turn_distance()
+        b.half_turn_distance_value = b.half_turn_distance()
+        _BLOCKS[key] = b
+    return b
+
+
+class CubieCube:
+    size = 3
+
+    def __init__(self, pieces, codes, decorative_blocks=[]):
+        self.pieces = pieces
+        self.codes = codes
+        self.decorative_blocks = decorative_blocks
+        self._blocks = None
+        self._hash = None
+
+    @staticmethod
+    def from_cube(cube):
+        if isinstance(cube, CubieCube):
+            return cube
+        if cube.size != 3:
+            raise ValueError(f"CubieCube only models 3x3 cubes, got size {cube.size}")
+        pieces = []
+        codes = []
+        for b in cube.blocks:
+            if b.solved_location not in SLOT_INDEX:
+                raise ValueError(f"Block {b} is not a corner or edge")
+            pieces.append(SLOT_INDEX[b.solved_location])
+            codes.append(encode(b))
+        return CubieCube(tuple(pieces), tuple(codes), cube.decorative_blocks)
+
+    def to_cube(self):
+        return Cube(3, list(self.blocks), self.decorative_blocks)
+
+    @property
+    def blocks(self):
+        if self._blocks is None:
+            self._blocks = [block(p, c) for p, c in zip(self.pieces, self.codes)]
+        return self._blocks
+
+    def locations(self):
+        return [c // 3 for c in self.codes]
+
+    def twists(self):
+        return [c % 3 for c in self.codes]
+
+    def pack(self):
+        # Codes fit in a byte each, so the bytes identify the cube among cubes with these pieces
+        return bytes(self.codes)
+
+    def unpack(self, packed):
+        return CubieCube(self.pieces, tuple(packed), self.decorative_blocks)
+
+    def apply(self, action):
+        table = move_table(action)
+        return CubieCube(self.pieces, tuple([table[c] for c in self.codes]), self.decorative_blocks)
+
+    def apply_moves(self, actions):
+        table = compile_moves(actions)
+        return CubieCube(self.pieces, tuple([table[c] for c in self.codes]), self.decorative_blocks)
+
+    def sub_cube(self, block_selector):
+        keep = [i for i, b in enumerate(self.blocks) if block_selector(b)]
+        decor = [b for b in self.decorative_blocks if block_selector(b)]
+        return CubieCube(tuple(self.pieces[i] for i in keep), tuple(self.codes[i] for i in keep), decor)
+
+    def sub_cube_from_cube(self, cube):
+        solved_positions = set((s.solved_location for s in cube.blocks))
+        return self.sub_cube(lambda c: c.solved_location in solved_positions)
+
+    def solved(self):
+        return all(c == p * 3 for p, c in zip(self.pieces, self.codes))
+
+    def turn_distance(self):
+        return sum(b.turn_distance_value for b in self.blocks)
+
+    def half_turn_distance(self):
+        return sum(b.half_turn_distance_value for b in self.blocks)
+
+    def __eq__(self, other):
+        return self.codes == other.codes and self.pieces == other.pieces
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.codes)
+        return self._hash
+
+
+class PackedCubeStates:
+    # Problem mixin for astar.search_compact: states are kept as packed CubieCube
+    # codes and unpacked onto the pieces of the initial state when expanded.
+    def pack_state(self, state):
+        return CubieCube.from_cube(state).pack()
+
+    def unpack_state(self, packed):
+        if getattr(self, "_packing_template", None) is None:
+            self._packing_template = CubieCube.from_cube(self.initial_state())
+        return self._packing_template.unpack(packed)
+
+
+if __name__ == "__main__":
+    # Performance testing, compare with structs.py
+    import random
+    import timeit
+
+    iterations = 400_000
+    cube = CubieCube.from_cube(Cube(3))
+
+    start = timeit.default_timer()
+
+    for i in range(iterations):
+        ai = random.randrange(len(ACTIONS))
+        cube = cube.apply(ACTIONS[ai])
+
+    end = timeit.default_timer()
+    print(f'Actions per second {iterations/(end-start)}')
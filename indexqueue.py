@@ -1,3 +1,6 @@
+import heapq
+
+
 class IndexedQueue:
     def __init__(self):
         self.heap = [()] # Null element at index 0
@@ -107,15 +110,164 @@ class IndexedQueue:
                     self._swap(index, right_i)
                     self._siftdown(right_i)
 
+class HeapQueue:
+    # Indexed binary heap like IndexedQueue, but sifting moves a hole down or up
+    # in a loop instead of recursing and swapping tuples at every level.
+    def __init__(self):
+        self.priorities = []
+        self.objects = []
+        self.index = {}
+
+    def add_or_update(self, priority, object):
+        index = self.index.get(object)
+        if index is None:
+            self.priorities.append(priority)
+            self.objects.append(object)
+            self._siftup(len(self.objects) - 1, priority, object)
+        elif priority < self.priorities[index]:
+            self._siftup(index, priority, object)
+        else:
+            self._siftdown(index, priority, object)
+
+    def get(self, object):
+        index = self.index.get(object)
+        if index is None:
+            return None
+        return self.priorities[index], object
+
+    def size(self):
+        return len(self.objects)
+
+    def empty(self):
+        return not self.objects
+
+    def pop(self):
+        priority = self.priorities[0]
+        object = self.objects[0]
+        del self.index[object]
+        last_priority = self.priorities.pop()
+        last = self.objects.pop()
+        if self.objects:
+            self._siftdown(0, last_priority, last)
+        return priority, object
+
+    def _siftup(self, index, priority, object):
+        priorities = self.priorities
+        objects = self.objects
+        while index > 0:
+            parent = (index - 1) >> 1
+            if not priority < priorities[parent]:
+                break
+            priorities[index] = priorities[parent]
+            objects[index] = objects[parent]
+            self.index[objects[index]] = index
+            index = parent
+        priorities[index] = priority
+        objects[index] = object
+        self.index[object] = index
+
+    def _siftdown(self, index, priority, object):
+        priorities = self.priorities
+        objects = self.objects
+        end = len(objects)
+        child = 2 * index + 1
+        while child < end:
+            if child + 1 < end and priorities[child + 1] < priorities[child]:
+                child += 1
+            if not priorities[child] < priority:
+                break
+            priorities[index] = priorities[child]
+            objects[index] = objects[child]
+            self.index[objects[index]] = index
+            index = child
+            child = 2 * index + 1
+        priorities[index] = priority
+        objects[index] = object
+        self.index[object] = index
+
+
+class BucketQueue:
+    # Open list for the small set of distinct priorities cube searches produce
+    # (integer g plus a pattern DB value, or multiples of 1/8). Objects are kept in
+    # a bucket per priority and, inside it, per tie_break(object); pop returns an
+    # object from the lowest priority and highest tie_break. Priorities and the ties
+    # of each bucket are kept in heaps, so push, update and pop are dict operations
+    # plus a heap push the first time a priority or tie is seen.
+    def __init__(self, tie_break=None):
+        self.tie_break = tie_break
+        self.buckets = {}
+        self.ties = {}
+        self.priorities = []
+        self.index = {}
+
+    def add_or_update(self, priority, object):
+        existing = self.index.get(object)
+        if existing is not None:
+            self._remove(object, *existing)
+        tie = self.tie_break(object) if self.tie_break else 0
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            bucket = self.buckets[priority] = {}
+            self.ties[priority] = []
+            heapq.heappush(self.priorities, priority)
+        objects = bucket.get(tie)
+        if objects is None:
+            objects = bucket[tie] = {}
+            heapq.heappush(self.ties[priority], -tie)
+        objects[object] = None
+        self.index[object] = (priority, tie)
+
+    def get(self, object):
+        existing = self.index.get(object)
+        if existing is None:
+            return None
+        return existing[0], object
+
+    def size(self):
+        return len(self.index)
+
+    def empty(self):
+        return not self.index
+
+    def pop(self):
+        # Priorities and ties whose bucket has emptied stay in their heap until
+        # they reach the top
+        while self.priorities[0] not in self.buckets:
+            heapq.heappop(self.priorities)
+        priority = self.priorities[0]
+        bucket = self.buckets[priority]
+        ties = self.ties[priority]
+        while -ties[0] not in bucket:
+            heapq.heappop(ties)
+        tie = -ties[0]
+        object, _ = bucket[tie].popitem()
+        del self.index[object]
+        self._discard_empty(priority, tie)
+        return priority, object
+
+    def _remove(self, object, priority, tie):
+        del self.buckets[priority][tie][object]
+        self._discard_empty(priority, tie)
+
+    def _discard_empty(self, priority, tie):
+        bucket = self.buckets[priority]
+        if not bucket[tie]:
+            del bucket[tie]
+            if not bucket:
+                del self.buckets[priority]
+                del self.ties[priority]
+
+
 if __name__ == "__main__":
-    q = IndexedQueue()
-    q.add_or_update(9, "c")
-    q.add_or_update(2, "b")
-    q.add_or_update(5, "d")
-    q.add_or_update(1, "a")
-    q.add_or_update(3, "c")
-    q.add_or_update(0, "!")
-    q.add_or_update(9, "!")
-
-    while not q.empty():
-        print(q.pop())
+    for queue in (IndexedQueue, HeapQueue, BucketQueue):
+        q = queue()
+        q.add_or_update(9, "c")
+        q.add_or_update(2, "b")
+        q.add_or_update(5, "d")
+        q.add_or_update(1, "a")
+        q.add_or_update(3, "c")
+        q.add_or_update(0, "!")
+        q.add_or_update(9, "!")
+
+        while not q.empty():
+            print(q.pop())
@@ -0,0 +1,187 @@
+from coordinates import DistanceTable, LocationCoordinate, OrientationCoordinate, PhaseCoordinate
+from cubie import CORNER_SLOTS, EDGE_SLOTS, SLOTS, CubieCube, move_table
+from structs import *
+import time
+
+# Phase 1 takes the cube into <R, L, U2, D2, F2, B2>: quarter turns about x and
+# half turns, the G2 of Thistlethwaite.py. Phase 2 solves it inside that group.
+PHASE1_ACTIONS = ACTIONS
+PHASE2_ACTIONS = QUARTER_X + HALF_FACE
+# Seconds a solve with only a length budget may take before its best is returned
+DEFAULT_TIMEOUT = 10
+
+
+def _successors(actions):
+    # successors[previous] lists the indices of actions worth trying after the
+    # action at index previous (len(actions) when there is none): never the same
+    # face twice in a row, and opposite faces, which commute, in one order only.
+    faces = []
+    face = []
+    for a in actions:
+        table = move_table(a)
+        moved = frozenset(s for s in range(len(SLOTS)) if table[s * 3] != s * 3)
+        if moved not in faces:
+            faces.append(moved)
+        face.append(faces.index(moved))
+    successors = []
+    for p in range(len(actions)):
+        successors.append([i for i, a in enumerate(actions)
+                           if face[i] != face[p] and not (a.axis == actions[p].axis and face[i] < face[p])])
+    successors.append(list(range(len(actions))))
+    return successors
+
+
+class TwoPhaseSolver:
+    def __init__(self):
+        x_slice = [s for s in EDGE_SLOTS if SLOTS[s].x == 0]
+        other_edges = [s for s in EDGE_SLOTS if SLOTS[s].x != 0]
+
+        self.corner_orientation = OrientationCoordinate("kociemba_corner_orientation", CORNER_SLOTS, PHASE1_ACTIONS)
+        self.edge_orientation = OrientationCoordinate("kociemba_edge_orientation", EDGE_SLOTS, PHASE1_ACTIONS)
+        self.slice = LocationCoordinate("kociemba_slice", x_slice, PHASE1_ACTIONS, ordered=False)
+        self.corner_orientation_slice = DistanceTable("kociemba_corner_orientation_slice", PhaseCoordinate([self.corner_orientation, self.slice]))
+        self.edge_orientation_slice = DistanceTable("kociemba_edge_orientation_slice", PhaseCoordinate([self.edge_orientation, self.slice]))
+
+        self.corners = LocationCoordinate("kociemba_corners", CORNER_SLOTS, PHASE2_ACTIONS)
+        self.edges = LocationCoordinate("kociemba_edges", other_edges, PHASE2_ACTIONS)
+        self.slice_permutation = LocationCoordinate("kociemba_slice_permutation", x_slice, PHASE2_ACTIONS)
+        self.corners_slice = DistanceTable("kociemba_corners_slice", PhaseCoordinate([self.corners, self.slice_permutation]))
+        self.edges_slice = DistanceTable("kociemba_edges_slice", PhaseCoordinate([self.edges, self.slice_permutation]))
+
+        self.successors = _successors(PHASE1_ACTIONS)
+        # Phase 2 moves as PHASE1_ACTIONS indices, so both phases share successors
+        self.phase2_moves = set(PHASE1_ACTIONS.index(a) for a in PHASE2_ACTIONS)
+
+    def solve(self, cube, max_length=None, timeout=None, callback=None):
+        # Keeps looking for shorter solutions until one of at most max_length moves
+        # is found or timeout seconds have passed, and returns the shortest found.
+        # Without either budget the first solution is returned. A length budget alone
+        # gets DEFAULT_TIMEOUT seconds, and the search also stops once phase 1 alone
+        # is longer than max_length. callback is called with every improved solution.
+        cube = CubieCube.from_cube(cube)
+        if max_length is None and timeout is None:
+            max_length = 1_000
+        elif timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        successors = self.successors
+        phase2_moves = self.phase2_moves
+        slices = self.slice.size
+        co_moves = self.corner_orientation.table
+        eo_moves = self.edge_orientation.table
+        slice_moves = self.slice.table
+        co_slice = self.corner_orientation_slice.table
+        eo_slice = self.edge_orientation_slice.table
+
+        # Phase 2 move tables indexed like PHASE1_ACTIONS
+        def phase2_table(coordinate):
+            return {i: coordinate.table[coordinate.action_index[PHASE1_ACTIONS[i]]] for i in phase2_moves}
+        corner_moves = phase2_table(self.corners)
+        edge_moves = phase2_table(self.edges)
+        slice_permutation_moves = phase2_table(self.slice_permutation)
+        permutations = self.slice_permutation.size
+        corners_slice = self.corners_slice.table
+        edges_slice = self.edges_slice.table
+        phase2_successors = [[i for i in s if i in phase2_moves] for s in successors]
+
+        best = None
+        path = []
+        nodes = 0
+
+        def out_of_time():
+            return best is not None and deadline is not None and time.perf_counter() > deadline
+
+        def phase2(c, e, s, depth, previous, moves):
+            # True when solved, or when time ran out with moves left unfinished
+            nonlocal nodes
+            if depth == 0:
+                return c == 0 and e == 0 and s == 0
+            nodes += 1
+            if nodes % 4096 == 0 and out_of_time():
+                return True
+            for a in phase2_successors[previous]:
+                nc = corner_moves[a][c]
+                ne = edge_moves[a][e]
+                ns = slice_permutation_moves[a][s]
+                if corners_slice[nc * permutations + ns] < depth and edges_slice[ne * permutations + ns] < depth:
+                    moves.append(a)
+                    if phase2(nc, ne, ns, depth - 1, a, moves):
+                        return True
+                    moves.pop()
+            return False
+
+        def finish():
+            # Solves phase 2 from the end of path. True stops the whole search.
+            nonlocal best
+            running = cube
+            for a in path:
+                running = running.apply(PHASE1_ACTIONS[a])
+            c = self.corners.compute(running)
+            e = self.edges.compute(running)
+            s = self.slice_permutation.compute(running)
+            h = max(corners_slice[c * permutations + s], edges_slice[e * permutations + s])
+            limit = (len(best) - 1 if best is not None else 30) - len(path)
+            previous = path[-1] if path else len(PHASE1_ACTIONS)
+            for depth in range(h, limit + 1):
+                moves = []
+                if phase2(c, e, s, depth, previous, moves):
+                    if len(moves) < depth:
+                        return True
+                    best = path + moves
+                    if callback:
+                        callback([PHASE1_ACTIONS[a] for a in best])
+                    break
+            return (best is not None and max_length is not None and len(best) <= max_length) or out_of_time()
+
+        def phase1(co, eo, sl, depth, previous):
+            nonlocal nodes
+            if depth == 0:
+                # Ending on a phase 2 move means a shorter phase 1 reaches the same state
+                if path and path[-1] in phase2_moves:
+                    return False
+                return finish()
+            nodes += 1
+            if nodes % 4096 == 0 and out_of_time():
+                return True
+            for a in successors[previous]:
+                nco = co_moves[a][co]
+                neo = eo_moves[a][eo]
+                nsl = slice_moves[a][sl]
+                if co_slice[nco * slices + nsl] < depth and eo_slice[neo * slices + nsl] < depth:
+                    path.append(a)
+                    if phase1(nco, neo, nsl, depth - 1, a):
+                        return True
+                    path.pop()
+            return False
+
+        co = self.corner_orientation.compute(cube)
+        eo = self.edge_orientation.compute(cube)
+        sl = self.slice.compute(cube)
+        depth = max(co_slice[co * slices + sl], eo_slice[eo * slices + sl])
+        while best is None or depth < len(best):
+            # Phase 1 alone takes depth moves, so past max_length no deeper phase 1
+            # can meet the length budget and the best solution so far is returned
+            if best is not None and max_length is not None and depth > max_length:
+                break
+            if phase1(co, eo, sl, depth, len(PHASE1_ACTIONS)):
+                break
+            depth += 1
+        return [PHASE1_ACTIONS[a] for a in best]
+
+
+if __name__ == "__main__":
+    import random
+
+    solver = TwoPhaseSolver()
+    random.seed(1)
+    for i in range(10):
+        cube = Cube(3)
+        for j in range(40):
+            cube = cube.apply(random.choice(ACTIONS))
+        start = time.perf_counter()
+        actions = solver.solve(cube, max_length=22, timeout=1)
+        elapsed = time.perf_counter() - start
+        for a in actions:
+            cube = cube.apply(a)
+        print(f"Solved={cube.solved()} in {len(actions)} turns, {elapsed:.3f}s")
@@ -0,0 +1,41 @@
+from structs import HALF_X, HALF_Y, HALF_Z, QUARTER_X, QUARTER_Y, QUARTER_Z
+
+# Standard move notation on this cube's axes: R is +x, U is +z and F is -y, which
+# keeps R, U and F right handed. Quarter turns are clockwise looking at the face.
+MOVES = {
+    "R": QUARTER_X[0], "L'": QUARTER_X[1], "R'": QUARTER_X[2], "L": QUARTER_X[3],
+    "B'": QUARTER_Y[0], "F": QUARTER_Y[1], "B": QUARTER_Y[2], "F'": QUARTER_Y[3],
+    "U'": QUARTER_Z[0], "D": QUARTER_Z[1], "U": QUARTER_Z[2], "D'": QUARTER_Z[3],
+    "R2": HALF_X[0], "L2": HALF_X[1],
+    "B2": HALF_Y[0], "F2": HALF_Y[1],
+    "U2": HALF_Z[0], "D2": HALF_Z[1],
+}
+NAMES = {a: name for name, a in MOVES.items()}
+
+
+def parse_moves(text):
+    actions = []
+    for token in text.split():
+        # R2' is written by some scramblers and is the same turn as R2
+        if token.endswith("2'"):
+            token = token[:-1]
+        if token not in MOVES:
+            raise ValueError(f"Unknown move {token!r}")
+        actions.append(MOVES[token])
+    return actions
+
+
+def format_moves(actions):
+    return " ".join(NAMES[a] for a in actions)
+
+
+if __name__ == "__main__":
+    from structs import Cube
+
+    sexy = parse_moves("R U R' U'")
+    cube = Cube(3)
+    for i in range(6):
+        for a in sexy:
+            cube = cube.apply(a)
+    print(f"(R U R' U')6 solved: {cube.solved()}")
+    print(format_moves(parse_moves("R2' U F' D2 L B2")))
@@ -0,0 +1,127 @@
+from operator import itemgetter
+from structs import Matrix, Vector
+
+# Facelet model of an NxN cube. Coordinates are doubled so that every size uses
+# integers: cubie centres run from -(N-1) to N-1 in steps of 2 along each axis
+# and a sticker is a cubie centre plus the outward normal of the face it is on.
+# The state is one byte per sticker holding the face its colour belongs to.
+NORMALS = [Vector(1, 0, 0), Vector(-1, 0, 0), Vector(0, 1, 0), Vector(0, -1, 0), Vector(0, 0, 1), Vector(0, 0, -1)]
+ROTATIONS = {
+    "x": (Vector.rotateX, Vector.rrotateX, Vector.halfX),
+    "y": (Vector.rotateY, Vector.rrotateY, Vector.halfY),
+    "z": (Vector.rotateZ, Vector.rrotateZ, Vector.halfZ),
+}
+
+
+def stickers(size):
+    # (cubie centre, normal) of every sticker, face by face
+    layers = range(-(size - 1), size, 2)
+    result = []
+    for n in NORMALS:
+        for a in layers:
+            for b in layers:
+                for c in layers:
+                    p = Vector(a, b, c)
+                    if p.x * n.x + p.y * n.y + p.z * n.z == size - 1:
+                        result.append((p, n))
+    return result
+
+
+class LayerMove:
+    # Turn of one layer, outer or inner, about an axis. layer is the doubled
+    # coordinate of the layer and turns is 1 (as rotateX), -1 (as rrotateX) or 2.
+    def __init__(self, size, axis, layer, turns, perm):
+        self.size = size
+        self.axis = axis
+        self.layer = layer
+        self.turns = turns
+        self.perm = perm
+        self.gather = itemgetter(*perm)
+
+    def __str__(self):
+        suffix = {1: "", -1: "'", 2: "2"}[self.turns]
+        return f"{self.axis}{self.layer}{suffix}"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+_moves = {}
+
+
+def moves(size):
+    # Every layer turn of an NxN cube: 3 axes x N layers x (quarter, inverse, half)
+    if size not in _moves:
+        positions = stickers(size)
+        index = {s: i for i, s in enumerate(positions)}
+        result = []
+        for axis, transforms in ROTATIONS.items():
+            for layer in range(-(size - 1), size, 2):
+                for turns, transform in zip((1, -1, 2), transforms):
+                    perm = list(range(len(positions)))
+                    for i, (p, n) in enumerate(positions):
+                        if getattr(p, axis) == layer:
+                            perm[index[(transform(p), transform(n))]] = i
+                    result.append(LayerMove(size, axis, layer, turns, tuple(perm)))
+        _moves[size] = result
+    return _moves[size]
+
+
+class FaceletCube:
+    def __init__(self, size, state=None):
+        self.size = size
+        if state is None:
+            per_face = size * size
+            state = bytes(f for f in range(len(NORMALS)) for i in range(per_face))
+        self.state = state
+
+    @staticmethod
+    def from_cube(cube):
+        # Stickers of a structs.Cube of the same size, blocks and centres alike
+        size = cube.size
+        if size % 2 == 0:
+            double = lambda v: Vector(*[(2 * abs(c) - 1) * (1 if c > 0 else -1) for c in v])
+        else:
+            double = lambda v: v * 2
+        index = {s: i for i, s in enumerate(stickers(size))}
+        state = bytearray(len(index))
+        for b in cube.blocks + cube.decorative_blocks:
+            rotor = Matrix.rotor(*b.orientations)
+            solved = double(b.solved_location)
+            actual = double(b.actual_location)
+            for face, n in enumerate(NORMALS):
+                if (solved.x * n.x + solved.y * n.y + solved.z * n.z) == size - 1:
+                    state[index[(actual, rotor * n)]] = face
+        return FaceletCube(size, bytes(state))
+
+    def apply(self, move):
+        return FaceletCube(self.size, bytes(move.gather(self.state)))
+
+    def solved(self):
+        per_face = self.size * self.size
+        return all(len(set(self.state[i:i + per_face])) == 1 for i in range(0, len(self.state), per_face))
+
+    def stickers(self):
+        # (cubie centre, normal, face of its colour) of every sticker, in cube units
+        return [(p * .5, n, NORMALS[c]) for (p, n), c in zip(stickers(self.size), self.state)]
+
+    def __eq__(self, other):
+        return self.state == other.state
+
+    def __hash__(self):
+        return hash(self.state)
+
+
+if __name__ == "__main__":
+    import random
+    import timeit
+
+    for size in range(2, 8):
+        all_moves = moves(size)
+        sequence = [random.choice(all_moves) for i in range(100_000)]
+        cube = FaceletCube(size)
+        start = timeit.default_timer()
+        for m in sequence:
+            cube = cube.apply(m)
+        end = timeit.default_timer()
+        print(f"{size}x{size}: {len(all_moves)} moves, {len(cube.state)} stickers, {len(sequence) / (end - start):.0f} moves per second")
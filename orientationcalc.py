@@ -1,45 +1,76 @@
 from collections import defaultdict
 from structs import *
-import random
+import os
+import pickle
 
 
-def calc_edge_orientations(actions):
-    cube = Cube(3).sub_cube(lambda c: c.actual_location.x == 1 and c.actual_location.y == 1 and c.actual_location.z == 0)
-    cube = Cube(3).sub_cube(edge)
-    peice_orientations = defaultdict(set)
+# Orientations reachable under an action set, by kind and action ids, shared by
+# every caller in the process and kept on disk next to the pattern DBs
+CACHE_PATH = "dbs/orientations.pickle"
+_cache = None
 
-    while True:
-        for i in range(100):
-            for b in cube.blocks:
-                os = b.orientations
-                peice_orientations[b.solved_location].add(tuple(os))
 
-            cube = cube.apply(random.choice(actions))
-        if all(len(v) == 12 for v in peice_orientations.values()):
-            return peice_orientations
+def _cached(kind, actions, compute):
+    global _cache
+    if _cache is None:
+        try:
+            _cache = pickle.load(open(CACHE_PATH, "rb"))
+        except:
+            _cache = {}
+    persistent = all(a in ACTIONS for a in actions)
+    key = (kind, tuple(ACTIONS.index(a) if persistent else a.id() for a in actions), persistent)
+    if key not in _cache:
+        _cache[key] = compute()
+        if persistent:
+            os.makedirs("dbs", exist_ok=True)
+            temp = f"{CACHE_PATH}.{os.getpid()}.tmp"
+            with open(temp, "wb") as f:
+                pickle.dump({k: v for k, v in _cache.items() if k[2]}, f)
+            os.replace(temp, CACHE_PATH)
+    return _cache[key]
 
-def calc_corner_orientations(actions):
-    cube = Cube(3).sub_cube(lambda c: c.actual_location.x == 1 and c.actual_location.y == 1 and c.actual_location.z == 1)
-    o_set = set()
 
-    while len(o_set) < 8:
-        os = cube.blocks[0].orientations
-        o_set.add(tuple([os[0], os[1]]))
+def _orbit(block, actions):
+    # Every state of a single block reachable under actions, breadth first
+    seen = {(block.actual_location, tuple(block.orientations))}
+    frontier = [block]
+    for b in frontier:
+        for a in actions:
+            child = b.apply(a)
+            state = (child.actual_location, tuple(child.orientations))
+            if state not in seen:
+                seen.add(state)
+                frontier.append(child)
+    return frontier
 
-        cube = cube.apply(random.choice(actions))
-    return o_set
+
+def calc_edge_orientations(actions):
+    def compute():
+        piece_orientations = defaultdict(set)
+        for b in Cube(3).sub_cube(edge).blocks:
+            for state in _orbit(b, actions):
+                piece_orientations[b.solved_location].add(tuple(state.orientations))
+        return piece_orientations
+    return _cached("edge", actions, compute)
+
+
+def calc_corner_orientations(actions):
+    def compute():
+        corner = Cube(3).sub_cube(lambda c: c.actual_location.x == 1 and c.actual_location.y == 1 and c.actual_location.z == 1).blocks[0]
+        return set(tuple(b.orientations) for b in _orbit(corner, actions))
+    return _cached("corner", actions, compute)
 
 
 
 if __name__ == "__main__":
     actions = QUARTER_X + QUARTER_Y + HALF_FACE
-    os = calc_edge_orientations(actions)
-    print(len(os))
+    orientations = calc_edge_orientations(actions)
+    print(len(orientations))
 
     # actions = QUARTER_X + QUARTER_Y + HALF_Z
-    # os = calc_edge_orientations(actions)
-    # print(os)
+    # orientations = calc_edge_orientations(actions)
+    # print(orientations)
 
     # actions = QUARTER_X + HALF_Y + HALF_Z
-    # os = calc_corner_orientations(actions)
-    # print(os)
+    # orientations = calc_corner_orientations(actions)
+    # print(orientations)
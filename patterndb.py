@@ -1,7 +1,15 @@
-from permutation import permutations
+from permutation import permutation_count, permutation_rank, permutations
 from orientationcalc import calc_edge_orientations
-from structs import ACTIONS, HALF_FACE, HALF_Z, QUARTER_X, QUARTER_Y, Cube, center, corner, edge, filter_actions, top
+from cubie import CORNER_SLOTS, EDGE_SLOTS, SLOT_INDEX, CubieCube, block, encode, is_corner_slot
+from symmetry import SYMMETRIES, canonical_codes
+from structs import ACTIONS, HALF_FACE, HALF_Z, QUARTER_X, QUARTER_Y, Cube, Vector, center, corner, edge, top
+import json
+import mmap
+import multiprocessing as mp
+import os
 import pickle
+import struct
+import zlib
 
 
 def vector_id(x, y, z):
@@ -94,6 +102,139 @@ class EdgeSliceKeyGen:
         return result
 
 
+class RankKeyGenerator:
+    # Perfect hash of the pieces at ordered_positions: Lehmer rank of the corner and
+    # edge locations followed by the base 3 corner twists and base 2 edge flips.
+    corner_position = {s: i for i, s in enumerate(CORNER_SLOTS)}
+    edge_position = {s: i for i, s in enumerate(EDGE_SLOTS)}
+
+    def __init__(self, ordered_positions):
+        self.pieces = [SLOT_INDEX[p] for p in ordered_positions]
+        self.corner_count = sum(is_corner_slot(p) for p in self.pieces)
+        self.edge_count = len(self.pieces) - self.corner_count
+        self.size = permutation_count(self.corner_count, 8) * permutation_count(self.edge_count, 12) * 3**self.corner_count * 2**self.edge_count
+
+    def key(self, blocks):
+        return self.key_from_codes([encode(b) for b in blocks])
+
+    def key_from_codes(self, codes):
+        corners = []
+        edges = []
+        twists = 0
+        flips = 0
+        for c in codes:
+            slot = c // 3
+            if slot in self.corner_position:
+                corners.append(self.corner_position[slot])
+                twists = twists * 3 + c % 3
+            else:
+                edges.append(self.edge_position[slot])
+                flips = flips * 2 + c % 3
+        rank = permutation_rank(corners, 8) * permutation_count(self.edge_count, 12) + permutation_rank(edges, 12)
+        return (rank * 3**self.corner_count + twists) * 2**self.edge_count + flips
+
+
+class DepthTable:
+    # Dict-like map from rank to depth packed two entries per byte
+    EMPTY = 15
+
+    def __init__(self, size, buffer=None, count=0):
+        self.size = size
+        self.count = count
+        self.buffer = buffer if buffer is not None else bytearray(b'\xff' * ((size + 1) // 2))
+
+    def _nibble(self, rank):
+        return (self.buffer[rank >> 1] >> ((rank & 1) << 2)) & 15
+
+    def get(self, rank, default=None):
+        value = self._nibble(rank)
+        return default if value == DepthTable.EMPTY else value
+
+    def __contains__(self, rank):
+        return self._nibble(rank) != DepthTable.EMPTY
+
+    def __getitem__(self, rank):
+        value = self._nibble(rank)
+        if value == DepthTable.EMPTY:
+            raise KeyError(rank)
+        return value
+
+    def __setitem__(self, rank, value):
+        if not 0 <= value < DepthTable.EMPTY:
+            raise ValueError(f"Depth {value} does not fit in a DepthTable")
+        if self._nibble(rank) == DepthTable.EMPTY:
+            self.count += 1
+        shift = (rank & 1) << 2
+        i = rank >> 1
+        self.buffer[i] = (self.buffer[i] & ~(15 << shift)) | (value << shift)
+
+    def __len__(self):
+        return self.count
+
+
+class KeyTable:
+    # Read only dict-like view over string keys stored as fixed width UTF-16 records
+    # in an open addressing hash table. A slot whose value is EMPTY holds no key.
+    EMPTY = 255
+
+    def __init__(self, buffer, count, width, slots):
+        self.count = count
+        self.width = width
+        self.mask = slots - 1
+        self.keys = buffer[:slots * width]
+        self.values = buffer[slots * width:slots * width + slots]
+
+    @staticmethod
+    def encode(key):
+        return key.encode("utf-16-be")
+
+    @staticmethod
+    def build(records, width):
+        # records are (padded key, depth) pairs. Returns the table bytes and slot count,
+        # a power of two at least twice the number of keys.
+        slots = 1
+        while slots < 2 * len(records):
+            slots *= 2
+        keys = bytearray(slots * width)
+        values = bytearray([KeyTable.EMPTY]) * slots
+        for record, value in records:
+            i = zlib.crc32(record) & (slots - 1)
+            while values[i] != KeyTable.EMPTY:
+                i = (i + 1) & (slots - 1)
+            keys[i * width:(i + 1) * width] = record
+            values[i] = value
+        return bytes(keys) + bytes(values), slots
+
+    def _find(self, key):
+        width = self.width
+        k = key.encode("utf-16-be").ljust(width, b'\0')
+        mask = self.mask
+        keys = self.keys
+        values = self.values
+        i = zlib.crc32(k) & mask
+        while values[i] != 255:
+            if keys[i * width:(i + 1) * width] == k:
+                return i
+            i = (i + 1) & mask
+        return None
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        return default if i is None else self.values[i]
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i is None:
+            raise KeyError(key)
+        return self.values[i]
+
+    def __len__(self):
+        return self.count
+
+
 class PatternDBData:
     pass
 
@@ -103,44 +244,78 @@ class PatternDB:
                  default_value=0,
                  match_on_solved_location=True,
                  key_generators=[ActualLocationKeyGenerator, OrientationKeyGenerator],
+                 ranked=False,
+                 symmetries=None,
                  data=None):
         if data:
             self.data = data
         else:
             self.data = PatternDBData()
             self.data.ordered_positions = ordered_positions
-            self.data.db = {}
             self.data.default_value = default_value
+            self.data.max_depth = default_value - 1
             self.data.matching_on_solved_location = match_on_solved_location
             self.data.key_generator_classes = key_generators
+            self.data.ranked = ranked
+            # Entries are keyed by the canonical member of each symmetry class
+            pieces = [SLOT_INDEX[p] for p in ordered_positions]
+            self.data.symmetries = [SYMMETRIES.index(s) for s in symmetries or [] if s.preserves(pieces)]
+            if ranked:
+                if not match_on_solved_location:
+                    raise ValueError("Ranked pattern DBs must match on solved location")
+                self.data.db = DepthTable(RankKeyGenerator(ordered_positions).size)
+            else:
+                self.data.db = {}
 
         if self.data.matching_on_solved_location:
             self.matcher = lambda p: lambda b: b.solved_location == p
         else:
             self.matcher = lambda p: lambda b: b.actual_location == p
+        self.ranker = None
+        if getattr(self.data, "ranked", False):
+            self.ranker = RankKeyGenerator(self.data.ordered_positions)
         self.key_generators = [c() for c in self.data.key_generator_classes]
+        self.symmetries = [SYMMETRIES[i] for i in getattr(self.data, "symmetries", [])]
+
+    def canonical_blocks(self, blocks):
+        pieces = [SLOT_INDEX[b.solved_location] for b in blocks]
+        codes = canonical_codes(pieces, [encode(b) for b in blocks], self.symmetries)
+        return [block(p, c) for p, c in zip(pieces, codes)]
 
     def create_key(self, blocks):
+        if self.symmetries:
+            blocks = self.canonical_blocks(blocks)
+        if self.ranker:
+            return self.ranker.key(blocks)
         if not self.data.matching_on_solved_location:  # Reorder blocks based on actual location
             blocks = self.matching_blocks(blocks)
         array = [gen.key(blocks) for gen in self.key_generators]
         return ''.join(array)
 
-    def insert_if_not_present(self, blocks, value):
-        key = self.create_key(blocks)
+    def insert_key_if_not_present(self, key, value):
         if key not in self.data.db:
             self.data.db[key] = value
             return True
         return False
 
+    def insert_if_not_present(self, blocks, value):
+        return self.insert_key_if_not_present(self.create_key(blocks), value)
+
+    def full_cube_key(self, cube: Cube):
+        if self.ranker and isinstance(cube, CubieCube):
+            return self.cube_key(cube)
+        return self.create_key(cube.blocks)
+
+    def permutation_keys(self, cube: Cube):
+        return [self.create_key(p) for p in permutations(cube.blocks)]
+
     def insert_full_cube(self, cube: Cube, value):
-        return self.insert_if_not_present(cube.blocks, value)
+        return self.insert_key_if_not_present(self.full_cube_key(cube), value)
 
     def insert_cube_with_permutations(self, cube: Cube, value):
-        blocks = cube.blocks
         inserted_anything = False
-        for p in permutations(blocks):
-            inserted_anything |= self.insert_if_not_present(p, value)
+        for key in self.permutation_keys(cube):
+            inserted_anything |= self.insert_key_if_not_present(key, value)
         return inserted_anything
 
     def matching_blocks(self, blocks):
@@ -158,20 +333,24 @@ class PatternDB:
     def matching_blocks_from_cube(self, cube: Cube):
         return self.matching_blocks(cube.blocks)
 
+    def cube_key(self, cube):
+        if self.ranker and isinstance(cube, CubieCube):
+            codes = dict(zip(cube.pieces, cube.codes))
+            codes = [codes[p] for p in self.ranker.pieces]
+            if self.symmetries:
+                codes = canonical_codes(self.ranker.pieces, codes, self.symmetries)
+            return self.ranker.key_from_codes(codes)
+        return self.create_key(self.matching_blocks_from_cube(cube))
+
     def get_from_cube(self, cube: Cube):
-        blocks = self.matching_blocks_from_cube(cube)
-        return self.get(blocks)
+        return self.data.db.get(self.cube_key(cube), self.data.default_value)
 
     def get(self, blocks):
         key = self.create_key(blocks)
-        if key in self.data.db:
-            return self.data.db[key]
-        else:
-            return self.data.default_value
+        return self.data.db.get(key, self.data.default_value)
 
     def contains_cube(self, cube):
-        blocks = self.matching_blocks_from_cube(cube)
-        return self.create_key(blocks) in self.data.db
+        return self.cube_key(cube) in self.data.db
 
 
 def corner_perm_db():
@@ -181,38 +360,214 @@ def corner_perm_db():
     })
 
 
-def build_db(name, cube: Cube, max_depth, actions=ACTIONS, insert_all_permutations=False, pattern_db_options={}):
+_builder = None
+
+
+def _init_builder(data, pieces, decorative_blocks, action_ids, insert_all_permutations):
+    global _builder
+    _builder = (PatternDB(data=data), pieces, decorative_blocks, [ACTIONS[i] for i in action_ids], insert_all_permutations)
+
+
+def _expand_chunk(chunk):
+    # Runs in a pool worker. Returns the keys and codes of every child in the same
+    # order a single process build would visit them, skipping repeats within the chunk.
+    db, pieces, decorative_blocks, actions, insert_all_permutations = _builder
+    seen = set()
+    result = []
+    for codes in chunk:
+        cube = CubieCube(pieces, codes, decorative_blocks)
+        for a in actions:
+            child = cube.apply(a)
+            keys = db.permutation_keys(child) if insert_all_permutations else [db.full_cube_key(child)]
+            if keys[0] not in seen:
+                seen.add(keys[0])
+                result.append((keys, child.codes))
+    return result
+
+
+# Mapped file layout: header, JSON description of the PatternDB, then the table
+# starting on an 8 byte boundary. Ranked DBs store the packed DepthTable buffer,
+# other DBs store the slots of a KeyTable: fixed width keys followed by one depth
+# byte per slot.
+MAPPED_MAGIC = b"RUBIKSDB"
+MAPPED_VERSION = 1
+MAPPED_HEADER = struct.Struct("<8sHHHHIQQI")
+SCHEME_RANKED = 0
+SCHEME_KEYS = 1
+
+
+def save_mapped_db(db, filepath):
+    data = db.data
+    meta = json.dumps({
+        "ordered_positions": [list(p) for p in data.ordered_positions],
+        "matching_on_solved_location": data.matching_on_solved_location,
+        "key_generators": [c.__name__ for c in data.key_generator_classes],
+        "ranked": getattr(data, "ranked", False),
+        "symmetries": getattr(data, "symmetries", []),
+    }).encode()
+    if isinstance(data.db, DepthTable):
+        scheme, width, size = SCHEME_RANKED, 0, data.db.size
+        table = bytes(data.db.buffer)
+    else:
+        items = [(KeyTable.encode(k), v) for k, v in data.db.items()]
+        width = max((len(k) for k, v in items), default=0)
+        table, size = KeyTable.build([(k.ljust(width, b'\0'), v) for k, v in items], width)
+        scheme = SCHEME_KEYS
+    max_depth = getattr(data, "max_depth", data.default_value - 1)
+    header = MAPPED_HEADER.pack(MAPPED_MAGIC, MAPPED_VERSION, scheme, data.default_value, max_depth, width, len(data.db), size, len(meta))
+    padding = b'\0' * (-(len(header) + len(meta)) % 8)
+
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    temp_path = f"{filepath}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header + meta + padding)
+        f.write(table)
+    os.replace(temp_path, filepath)
+
+
+def open_mapped_db(filepath):
+    with open(filepath, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mapped) < MAPPED_HEADER.size:
+        raise ValueError(f"{filepath} is too short to be a pattern DB")
+    magic, version, scheme, default_value, max_depth, width, count, size, meta_length = MAPPED_HEADER.unpack_from(mapped, 0)
+    if magic != MAPPED_MAGIC or version != MAPPED_VERSION:
+        raise ValueError(f"{filepath} is not a version {MAPPED_VERSION} pattern DB")
+    view = memoryview(mapped)
+    offset = MAPPED_HEADER.size + meta_length
+    meta = json.loads(bytes(view[MAPPED_HEADER.size:offset]))
+    offset += -offset % 8
+
+    data = PatternDBData()
+    data.ordered_positions = [Vector(*p) for p in meta["ordered_positions"]]
+    data.default_value = default_value
+    data.max_depth = max_depth
+    data.matching_on_solved_location = meta["matching_on_solved_location"]
+    data.key_generator_classes = [globals()[n] for n in meta["key_generators"]]
+    data.ranked = meta["ranked"]
+    data.symmetries = meta["symmetries"]
+    if scheme == SCHEME_RANKED:
+        data.db = DepthTable(size, view[offset:offset + (size + 1) // 2], count)
+    else:
+        data.db = KeyTable(view[offset:], count, width, size)
+    return PatternDB(data=data)
+
+
+def convert_pickled_db(pickle_path, mapped_path):
+    db = PatternDB(data=pickle.load(open(pickle_path, "rb")))
+    save_mapped_db(db, mapped_path)
+    return open_mapped_db(mapped_path)
+
+
+# Every DB build_db has returned in this process, by name and build parameters,
+# so problems constructed once per solve share a single copy of each table
+_registry = {}
+
+
+def _registry_key(name, max_depth, actions, insert_all_permutations, options):
+    described = []
+    for option, value in sorted(options.items()):
+        if option == "key_generators":
+            value = tuple(g.__name__ for g in value)
+        elif option == "symmetries":
+            value = tuple(SYMMETRIES.index(s) for s in value)
+        described.append((option, value))
+    return (name, max_depth, tuple(a.id() for a in actions), insert_all_permutations, tuple(described))
+
+
+def loaded_dbs():
+    return sorted(set(key[0] for key in _registry))
+
+
+def unload_dbs(*names):
+    # Forgets the named DBs, or all of them, so the next build_db opens them again
+    for key in list(_registry):
+        if not names or key[0] in names:
+            del _registry[key]
+
+
+def build_db(name, cube: Cube, max_depth, actions=ACTIONS, insert_all_permutations=False, pattern_db_options={}, workers=1):
+    registry_key = _registry_key(name, max_depth, actions, insert_all_permutations, pattern_db_options)
+    if registry_key not in _registry:
+        _registry[registry_key] = _load_or_build_db(name, cube, max_depth, actions, insert_all_permutations, pattern_db_options, workers)
+    return _registry[registry_key]
+
+
+def _load_or_build_db(name, cube, max_depth, actions, insert_all_permutations, pattern_db_options, workers):
     cube = cube.sub_cube(~center)
-    filepath = f"dbs/{name}.db"
+    filepath = f"dbs/{name}.rdb"
+    options = dict(pattern_db_options)
+    if options.get("symmetries"):
+        # Only symmetries mapping the action set onto itself give symmetric search trees
+        options["symmetries"] = [s for s in options["symmetries"] if s.preserves_actions(actions)]
+    pieces = [SLOT_INDEX[b.solved_location] for b in cube.blocks]
+    symmetries = [SYMMETRIES.index(s) for s in options.get("symmetries") or [] if s.preserves(pieces)]
+
+    # Only a missing or unreadable file is rebuilt, anything else is a real error. A
+    # file built with other symmetries than asked for is rebuilt as well.
     try:
-        db_data = pickle.load(open(filepath, "rb"))
-        return PatternDB(data=db_data)
-    except:
+        db = open_mapped_db(filepath)
+        if db.data.symmetries == symmetries:
+            return db
+    except (FileNotFoundError, ValueError):
         pass
-
-    db = PatternDB(ordered_positions=[b.solved_location for b in cube.blocks], default_value=max_depth+1, **pattern_db_options)
-
-    def recurse(cube, depth, remaining_actions, previous_action):
-        nonlocal actions
-        if remaining_actions == 0:
-            if insert_all_permutations:
-                return db.insert_cube_with_permutations(cube, depth)
+    if not symmetries:
+        try:
+            return convert_pickled_db(f"dbs/{name}.db", filepath)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    db = PatternDB(ordered_positions=[b.solved_location for b in cube.blocks], default_value=max_depth+1, **options)
+    if cube.size == 3:
+        cube = CubieCube.from_cube(cube)
+    insert = db.insert_cube_with_permutations if insert_all_permutations else db.insert_full_cube
+
+    # Breadth first: a state is expanded only from the level where its key was first
+    # inserted. Keys are a function of the tracked pieces, so two states with the
+    # same key have children with the same keys and only one needs expanding.
+    print(f"[{name}]: Building DB level 0")
+    insert(cube, 0)
+    frontier = [cube]
+
+    # Workers expand slices of the frontier and the keys are inserted here in
+    # frontier order, so the result matches a single process build exactly.
+    pool = None
+    if workers > 1 and isinstance(cube, CubieCube) and all(a in ACTIONS for a in actions):
+        config = PatternDBData()
+        config.__dict__.update(db.data.__dict__)
+        config.db = {}
+        pool = mp.Pool(workers, initializer=_init_builder,
+                       initargs=(config, cube.pieces, cube.decorative_blocks, [ACTIONS.index(a) for a in actions], insert_all_permutations))
+    try:
+        for d in range(1, max_depth):
+            print(f"[{name}]: Building DB level {d}")
+            next_frontier = []
+            if pool:
+                chunk_size = max(1, len(frontier) // (workers * 4))
+                chunks = [[c.codes for c in frontier[i:i+chunk_size]] for i in range(0, len(frontier), chunk_size)]
+                for result in pool.imap(_expand_chunk, chunks):
+                    for keys, codes in result:
+                        inserted = False
+                        for key in keys:
+                            inserted |= db.insert_key_if_not_present(key, d)
+                        if inserted:
+                            next_frontier.append(CubieCube(cube.pieces, codes, cube.decorative_blocks))
             else:
-                return db.insert_full_cube(cube, depth)
-        inserted_something = False
-        for a in filter_actions(actions, previous_action):
-            did_insert = recurse(cube.apply(a), depth, remaining_actions-1, a)
-            inserted_something |= did_insert
-        return inserted_something
-
-    for d in range(max_depth):
-        print(f"[{name}]: Building DB level {d}")
-        inserted_something = recurse(cube, d, d, None)
-        if not inserted_something:
-            print("Halting before max depth as all states have be found already")
-            break
+                for c in frontier:
+                    for a in actions:
+                        child = c.apply(a)
+                        if insert(child, d):
+                            next_frontier.append(child)
+            if not next_frontier:
+                print("Halting before max depth as all states have be found already")
+                break
+            frontier = next_frontier
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
     print(f"[{name}]: Built db with {len(db.data.db)} elements. Saving to disk.")
-    pickle.dump(db.data, open(filepath, "wb"))
+    save_mapped_db(db, filepath)
     return db
 
 
@@ -224,6 +579,13 @@ if __name__ == "__main__":
     built_db = build_db("test", cube, 4)
     print("db size", len(built_db.data.db))
 
+    ranked_db = build_db("rankedtest", cube, 4, pattern_db_options={"ranked": True})
+    print("ranked db size", len(ranked_db.data.db), "of", ranked_db.data.db.size, "ranks")
+
+    from symmetry import preserving_axes
+    symmetric_db = build_db("symmetrytest", cube, 4, pattern_db_options={"symmetries": preserving_axes("z")})
+    print("symmetry reduced db size", len(symmetric_db.data.db))
+
     edge_cube = Cube(3).sub_cube(edge)
     build_db("edgetest", edge_cube, 6, pattern_db_options={
         "match_on_solved_location": False,
@@ -15,4 +15,21 @@ def permutations(array):
                     vals[0], vals[k-1] = vals[k-1], vals[0]
                 for g in generate(k-1, vals):
                     yield g
-    return generate(len(copy), copy)
\ No newline at end of file
+    return generate(len(copy), copy)
+
+# Lehmer code rank of distinct values drawn from range(n). Ranks of sequences of
+# length k cover range(n!/(n-k)!) without gaps.
+def permutation_rank(values, n):
+    rank = 0
+    used = 0
+    for i, v in enumerate(values):
+        rank = rank * (n - i) + v - (used & ((1 << v) - 1)).bit_count()
+        used |= 1 << v
+    return rank
+
+
+def permutation_count(k, n):
+    count = 1
+    for i in range(k):
+        count *= n - i
+    return count
@@ -4,6 +4,7 @@ from mpl_toolkits.mplot3d.art3d import Poly3DCollection, line_2d_to_3d
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 from structs import *
+from nxn import FaceletCube
 from time import sleep
 from random import randrange
 
@@ -39,6 +40,21 @@ def block_to_3dcollection(block, size) :
     c.set_facecolor(["Blue", "Yellow", "Orange", "White", "Green", "Red"])
     return c
 
+FACE_COLOURS = {(1, 0, 0): "Blue", (0, 0, -1): "Yellow", (-1, 0, 0): "Orange", (0, 0, 1): "White", (0, 1, 0): "Green", (0, -1, 0): "Red"}
+
+def facelets_to_3dcollection(cube):
+    verts = []
+    colours = []
+    for p, n, colour in cube.stickers():
+        # Half steps along the two axes the sticker lies in
+        u, v = [Vector(*[.5 * (i == axis) for i in range(3)]) for axis, c in enumerate(n) if c == 0]
+        centre = p + n * .5
+        verts.append(f_to_v([centre + u + v, centre + u + v * -1, centre + (u + v) * -1, centre + u * -1 + v]))
+        colours.append(FACE_COLOURS[tuple(colour)])
+    c = Poly3DCollection(verts, closed=True)
+    c.set_facecolor(colours)
+    return c
+
 
 def PlotProcess(cube_queue):
     fig = plt.figure()
@@ -70,6 +86,10 @@ def PlotProcess(cube_queue):
         plt.grid(False)
         plt.axis('off')
         ax.collections = []
+        if isinstance(cube, FaceletCube):
+            ax.add_collection3d(facelets_to_3dcollection(cube))
+            plt.draw()
+            return
         for b in cube.blocks:
             ax.add_collection3d(block_to_3dcollection(b, size))
         for b in cube.decorative_blocks:
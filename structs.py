@@ -80,6 +80,30 @@ class Matrix:
         return Matrix(v1, v2, v1.cross(v2))
 
 
+ZOBRIST_MASK = (1 << 64) - 1
+
+
+def zobrist_key(code):
+    # splitmix64 finaliser: a fixed pseudo random 64 bit key per block state, the
+    # same in every process
+    z = (code * 0x9E3779B97F4A7C15) & ZOBRIST_MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & ZOBRIST_MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & ZOBRIST_MASK
+    return z ^ (z >> 31)
+
+
+# Key for every (actual location, orientations, solved location) seen so far
+ZOBRIST_KEYS = {}
+
+
+def _zobrist_code(state):
+    # 5 bits per coordinate, enough for the locations of a 7x7
+    p = 0
+    for v in state:
+        p = p << 5 | v + 16
+    return p
+
+
 class Block:
     initial_orientations = [Vector(1, 0, 0), Vector(0, 1, 0)]
 
@@ -87,7 +111,8 @@ class Block:
         self.solved_location = solved_location
         self.actual_location = actual_location or solved_location.copy()
         self.orientations = orientations or Block.initial_orientations
-        self._hash = None
+        self._packed = None
+        self._zobrist = None
 
     def apply(self, action):
         if action.applies(self):
@@ -161,10 +186,25 @@ class Block:
     def __eq__(self, other):
         return self.actual_location == other.actual_location and self.orientations == other.orientations  # and self.solved_location == other.solved_location
 
+    def packed(self):
+        if self._packed is None:
+            a = self.actual_location
+            o, p = self.orientations[0], self.orientations[1]
+            self._packed = (a.x, a.y, a.z, o.x, o.y, o.z, p.x, p.y, p.z)
+        return self._packed
+
+    def zobrist(self):
+        if self._zobrist is None:
+            s = self.solved_location
+            state = self.packed() + (s.x, s.y, s.z)
+            key = ZOBRIST_KEYS.get(state)
+            if key is None:
+                key = ZOBRIST_KEYS[state] = zobrist_key(_zobrist_code(state))
+            self._zobrist = key
+        return self._zobrist
+
     def __hash__(self):
-        if not self._hash:
-            self._hash = hash((self.solved_location, self.actual_location, self.orientations[0], self.orientations[1]))
-        return self._hash
+        return self.zobrist()
 
 
 class Cube:
@@ -186,10 +226,23 @@ class Cube:
             self.blocks = blocks
             self.decorative_blocks = decorative_blocks
         self._hash = None
+        self._packed = None
 
     def apply(self, action):
-        blocks = [b.apply(action) for b in self.blocks]
-        return Cube(self.size, blocks=blocks, decorative_blocks=self.decorative_blocks)
+        h = self._hash
+        if h is None:
+            blocks = [b.apply(action) for b in self.blocks]
+        else:
+            # Zobrist hash: only the blocks the action moved change it
+            blocks = []
+            for b in self.blocks:
+                moved = b.apply(action)
+                if moved is not b:
+                    h ^= b.zobrist() ^ moved.zobrist()
+                blocks.append(moved)
+        cube = Cube(self.size, blocks=blocks, decorative_blocks=self.decorative_blocks)
+        cube._hash = h
+        return cube
 
     def sub_cube(self, block_selector):
         blocks = []
@@ -213,13 +266,22 @@ class Cube:
     def half_turn_distance(self):
         return sum((b.half_turn_distance() for b in self.blocks))
 
+    def packed(self):
+        if self._packed is None:
+            self._packed = tuple([b.packed() for b in self.blocks])
+        return self._packed
+
     def __eq__(self, other):
-        return self.blocks == other.blocks
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        return self.packed() == other.packed()
 
     def __hash__(self):
-        # return super().__hash__()
-        if not self._hash:
-            self._hash = hash(tuple([hash(b) for b in self.blocks]))
+        if self._hash is None:
+            h = 0
+            for b in self.blocks:
+                h ^= b.zobrist()
+            self._hash = h
         return self._hash
 
 
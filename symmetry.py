@@ -0,0 +1,113 @@
+from itertools import permutations, product
+from cubie import CODE_COUNT, ORIENTATIONS, SLOT_INDEX, SLOTS, CubieCube, block, encode, move_table
+from structs import ACTIONS, Block, Cube, Matrix, Vector
+
+AXES = [Vector(1, 0, 0), Vector(0, 1, 0), Vector(0, 0, 1)]
+
+
+class Symmetry:
+    # One of the 48 rotations and reflections mapping the cube onto itself.
+    # Conjugating a cube by a symmetry relabels it as seen through the symmetry:
+    # the piece solved at s is replaced by the piece solved at S*s, and the action
+    # a applied to the original matches action(a) applied to the conjugate.
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.inverse_matrix = Matrix(*[Vector(*row) for row in zip(*(tuple(c) for c in (matrix.c1, matrix.c2, matrix.c3)))])
+        self.piece_map = [SLOT_INDEX[matrix * s] for s in SLOTS]
+        self.code_map = [[0] * CODE_COUNT for s in SLOTS]
+        for p in range(len(SLOTS)):
+            for c in ORIENTATIONS[p]:
+                self.code_map[p][c] = encode(self.conjugate_block(block(p, c)))
+        self._actions = {}
+
+    def preserves(self, pieces):
+        return set(self.piece_map[p] for p in pieces) == set(pieces)
+
+    def conjugate_block(self, b):
+        rotor = Matrix.rotor(*b.orientations)
+        orientations = [self.matrix * (rotor * (self.inverse_matrix * v)) for v in Block.initial_orientations]
+        return Block(self.matrix * b.solved_location, self.matrix * b.actual_location, orientations)
+
+    def conjugate(self, cube):
+        decor = [self.conjugate_block(b) for b in cube.decorative_blocks]
+        if isinstance(cube, CubieCube):
+            pieces = tuple([self.piece_map[p] for p in cube.pieces])
+            codes = tuple([self.code_map[p][c] for p, c in zip(cube.pieces, cube.codes)])
+            return CubieCube(pieces, codes, decor)
+        return Cube(cube.size, [self.conjugate_block(b) for b in cube.blocks], decor)
+
+    def conjugate_codes(self, pieces, codes):
+        # Conjugate of the pieces at codes, listed in the order of pieces. Only valid
+        # when the symmetry maps the set of pieces onto itself.
+        result = dict(zip([self.piece_map[p] for p in pieces], [self.code_map[p][c] for p, c in zip(pieces, codes)]))
+        return tuple([result[p] for p in pieces])
+
+    def action(self, action, actions=ACTIONS):
+        if action not in self._actions:
+            table = move_table(action)
+            conjugated = list(range(CODE_COUNT))
+            for p in range(len(SLOTS)):
+                for c in ORIENTATIONS[p]:
+                    conjugated[self.code_map[p][c]] = self.code_map[p][table[c]]
+            matches = [a for a in actions if move_table(a) == conjugated]
+            self._actions[action] = matches[0] if matches else None
+        return self._actions[action]
+
+    def preserves_actions(self, actions):
+        return all(self.action(a, actions) in actions for a in actions)
+
+
+def _symmetries():
+    result = []
+    for order in permutations(range(3)):
+        for signs in product((1, -1), repeat=3):
+            columns = [AXES[order[i]] * signs[i] for i in range(3)]
+            result.append(Symmetry(Matrix(*columns)))
+    return result
+
+
+SYMMETRIES = _symmetries()
+IDENTITY = SYMMETRIES[0]
+
+
+def preserving_axes(axes):
+    # Symmetries that map each of the given axes ("x", "y", "z") onto itself
+    indices = ["xyz".index(a) for a in axes]
+    result = []
+    for s in SYMMETRIES:
+        columns = [s.matrix.c1, s.matrix.c2, s.matrix.c3]
+        if all(abs(tuple(columns[i])[i]) == 1 for i in indices):
+            result.append(s)
+    return result
+
+
+def canonical_codes(pieces, codes, symmetries=SYMMETRIES):
+    return min(s.conjugate_codes(pieces, codes) for s in symmetries)
+
+
+def canonical(cube, symmetries=SYMMETRIES):
+    # Smallest conjugate of the cube among the symmetries preserving its pieces,
+    # together with the symmetry that produced it.
+    cube = CubieCube.from_cube(cube)
+    best = None
+    for s in symmetries:
+        if s.preserves(cube.pieces):
+            codes = s.conjugate_codes(cube.pieces, cube.codes)
+            if best is None or codes < best[0]:
+                best = (codes, s)
+    return CubieCube(cube.pieces, best[0], cube.decorative_blocks), best[1]
+
+
+if __name__ == "__main__":
+    import random
+
+    cube = CubieCube.from_cube(Cube(3))
+    for i in range(20):
+        cube = cube.apply(random.choice(ACTIONS))
+
+    for s in SYMMETRIES:
+        a = random.choice(ACTIONS)
+        assert s.conjugate(cube.apply(a)) == s.conjugate(cube).apply(s.action(a))
+    print("Conjugation commutes with all 48 symmetries")
+    print("Symmetries preserving z", len(preserving_axes("z")))
+    print("Symmetries preserving all axes", len(preserving_axes("xyz")))
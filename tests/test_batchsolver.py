@@ -0,0 +1,35 @@
+from batchsolver import BatchStats, solve_batch, table_solver
+from structs import ACTIONS, Cube
+
+
+def failing_solver(cube, callback=None):
+    if not cube.solved():
+        raise RuntimeError("solver failed")
+    return []
+
+
+def test_failures_do_not_end_the_batch():
+    items = [[ACTIONS[0]], [ACTIONS[3]], [None], []]
+    stats = BatchStats()
+    results = sorted(solve_batch(items, failing_solver, workers=1, stats=stats), key=lambda r: r.index)
+    assert [r.solved() for r in results] == [False, False, False, True]
+    assert "solver failed" in results[0].error
+    assert stats.failures == 3 and stats.solves == 1
+
+
+def test_batch_solves_are_correct():
+    items = [[ACTIONS[i], ACTIONS[(i * 5) % len(ACTIONS)], ACTIONS[(i * 7) % len(ACTIONS)]] for i in range(4)]
+    for result in solve_batch(items, table_solver, workers=1):
+        cube = Cube(3)
+        for a in items[result.index] + result.actions:
+            cube = cube.apply(a)
+        assert cube.solved()
+
+
+def test_latency_sample_is_bounded():
+    stats = BatchStats()
+    for i in range(3 * BatchStats.RESERVOIR_SIZE):
+        stats.record_latency(i / BatchStats.RESERVOIR_SIZE)
+    assert len(stats.latencies) == BatchStats.RESERVOIR_SIZE
+    assert 1.2 < stats.percentile(50) < 1.8
+    assert stats.percentile(99) > 2.8
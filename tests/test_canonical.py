@@ -0,0 +1,46 @@
+from astar import bidirectional_search
+from canonical import automaton
+from cubie import CubieCube, apply_moves
+from notation import parse_moves
+from structs import ACTIONS, Cube
+import Thistlethwaite
+
+
+def reachable(actions, depth, next_actions):
+    # States reachable in at most depth moves. next_actions(state) lists (action, next state)
+    start = CubieCube.from_cube(Cube(3))
+    seen = {start}
+    frontier = [(start, automaton(actions).START)]
+    for d in range(depth):
+        next_frontier = []
+        for cube, state in frontier:
+            for a, child_state in next_actions(state):
+                child = cube.apply(a)
+                seen.add(child)
+                next_frontier.append((child, child_state))
+        frontier = next_frontier
+    return seen
+
+
+def test_canonical_sequences_reach_every_state():
+    moves = automaton(ACTIONS)
+    every = reachable(ACTIONS, 3, lambda state: [(a, 0) for a in ACTIONS])
+    canonical = reachable(ACTIONS, 3, lambda state: [(a, moves.next(state, a)) for a in moves.allowed[state]])
+    assert canonical == every
+
+
+def test_sequence_counts():
+    assert [automaton(ACTIONS).count_sequences(n) for n in range(1, 5)] == [18, 243, 3240, 43254]
+
+
+class AllHalfTurns(Thistlethwaite.Group3ToFinalProblem):
+    def actions(self, node):
+        return self._actions
+
+
+def test_solution_lengths_unchanged():
+    for scramble in ("R2 U2 F2 L2 D2 B2 R2", "U2 R2 U2 R2 F2 D2", "L2 B2 D2 F2 R2 U2 L2 D2"):
+        cube = CubieCube.from_cube(apply_moves(Cube(3), parse_moves(scramble)))
+        _, pruned = bidirectional_search(Thistlethwaite.Group3ToFinalProblem(cube))
+        _, every = bidirectional_search(AllHalfTurns(cube))
+        assert len(pruned) == len(every)
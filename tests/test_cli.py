@@ -0,0 +1,30 @@
+import json
+import sys
+import pytest
+from cli import main
+from cubie import apply_moves
+from notation import parse_moves
+from structs import Cube
+
+
+def test_solves_file_and_restores_stdout(tmp_path):
+    scrambles = tmp_path / "scrambles.txt"
+    scrambles.write_text("# comment\nR U R' U'\n\nF2 X\nD L2 B'\n")
+    output = tmp_path / "out.jsonl"
+    stdout = sys.stdout
+    assert main([str(scrambles), "--workers", "1", "--output", str(output)]) == 0
+    assert sys.stdout is stdout
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["line"] for r in records) == [2, 4, 5]
+    for r in records:
+        if r["line"] == 4:
+            assert "error" in r
+        else:
+            cube = apply_moves(Cube(3), parse_moves(r["scramble"]) + parse_moves(r["solution"]))
+            assert cube.solved()
+
+
+@pytest.mark.parametrize("argv", [["--timeout", "1"], ["--solver", "kociemba", "--max-length", "16"]])
+def test_rejects_unbounded_or_ignored_options(argv, tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "missing.txt")] + argv)
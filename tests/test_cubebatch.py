@@ -0,0 +1,35 @@
+import random
+import pytest
+from cubie import CubieCube
+from structs import ACTIONS, Cube
+
+np = pytest.importorskip("numpy")
+from cubebatch import CubeBatch, action_indices
+
+
+def as_dict(cube):
+    return dict(zip(cube.pieces, cube.codes))
+
+
+def test_batch_matches_cubie_cube():
+    rng = random.Random(0)
+    scrambles = [[rng.randrange(len(ACTIONS)) for j in range(25)] for i in range(50)]
+    batch = CubeBatch.identity(len(scrambles)).apply_sequence(np.array(scrambles))
+    for cube, moves in zip(batch.to_cubes(), scrambles):
+        expected = CubieCube.from_cube(Cube(3))
+        for i in moves:
+            expected = expected.apply(ACTIONS[i])
+        assert as_dict(cube) == as_dict(expected)
+
+
+def test_from_cubes_round_trip_and_undo():
+    rng = random.Random(1)
+    cubes = [CubieCube.from_cube(Cube(3)).apply_moves([rng.choice(ACTIONS) for j in range(20)]) for i in range(10)]
+    batch = CubeBatch.from_cubes(cubes)
+    assert [as_dict(c) for c in batch.to_cubes()] == [as_dict(c) for c in cubes]
+    assert not batch.solved().any()
+
+    moves = [rng.randrange(len(ACTIONS)) for j in range(15)]
+    inverses = action_indices([ACTIONS[i].inverse for i in reversed(moves)])
+    assert [as_dict(c) for c in batch.apply_sequence(moves).apply_sequence(inverses).to_cubes()] == [as_dict(c) for c in cubes]
+    assert CubeBatch.identity(3).solved().all()
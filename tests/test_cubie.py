@@ -0,0 +1,47 @@
+import random
+from cubie import CubieCube, apply_moves, compile_moves
+from structs import ACTIONS, Cube, corner, edge
+
+
+def scramble(rng, length):
+    return [rng.choice(ACTIONS) for i in range(length)]
+
+
+def test_cubie_cube_matches_cube():
+    rng = random.Random(0)
+    for i in range(20):
+        cube = Cube(3)
+        cubie = CubieCube.from_cube(cube)
+        for a in scramble(rng, 30):
+            cube = cube.apply(a)
+            cubie = cubie.apply(a)
+            assert cubie == CubieCube.from_cube(cube)
+            assert cubie.solved() == cube.solved()
+        assert cubie.to_cube() == cube
+
+
+def test_sub_cubes_match_cube():
+    rng = random.Random(1)
+    for selector in (corner, edge):
+        cube = Cube(3).sub_cube(selector)
+        cubie = CubieCube.from_cube(cube)
+        for a in scramble(rng, 30):
+            cube = cube.apply(a)
+            cubie = cubie.apply(a)
+        assert cubie == CubieCube.from_cube(cube)
+
+
+def test_pack_round_trip():
+    cube = CubieCube.from_cube(Cube(3)).apply_moves(scramble(random.Random(2), 25))
+    assert cube.unpack(cube.pack()) == cube
+
+
+def test_compiled_moves_match_move_by_move():
+    rng = random.Random(3)
+    for i in range(20):
+        moves = scramble(rng, rng.randrange(60))
+        cube = Cube(3)
+        for a in moves:
+            cube = cube.apply(a)
+        assert apply_moves(Cube(3), moves) == cube
+        assert compile_moves(moves) is compile_moves(list(moves))
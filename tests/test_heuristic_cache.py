@@ -0,0 +1,17 @@
+import pytest
+from astar import HeuristicCache
+
+
+@pytest.mark.parametrize("policy", ["lru", "clock"])
+def test_maxsize_must_be_positive(policy):
+    with pytest.raises(ValueError):
+        HeuristicCache(0, policy)
+
+
+@pytest.mark.parametrize("policy", ["lru", "clock"])
+def test_cache_stays_bounded(policy):
+    cache = HeuristicCache(3, policy)
+    values = [cache.get(s % 5, lambda s: s * 2) for s in range(20)]
+    assert values == [(s % 5) * 2 for s in range(20)]
+    assert len(cache) == 3
+    assert cache.hits + cache.misses == 20
@@ -0,0 +1,20 @@
+import random
+from astar import bidirectional_search, ida_star, search
+from cubie import CubieCube, apply_moves
+from structs import HALF_FACE, Cube
+import Thistlethwaite
+
+
+def half_turn_scramble(seed, length):
+    rng = random.Random(seed)
+    return apply_moves(Cube(3), [rng.choice(HALF_FACE) for i in range(length)])
+
+
+def test_ida_star_matches_other_searches():
+    for seed in range(3):
+        cube = CubieCube.from_cube(half_turn_scramble(seed, 10))
+        _, actions = ida_star(Thistlethwaite.Group3ToFinalProblem(cube))
+        _, shortest = bidirectional_search(Thistlethwaite.Group3ToFinalProblem(cube))
+        _, searched = search(Thistlethwaite.Group3ToFinalProblem(cube))
+        assert len(actions) == len(shortest) == len(searched)
+        assert apply_moves(cube, actions[1:]).solved()
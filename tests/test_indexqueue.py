@@ -0,0 +1,74 @@
+import random
+import pytest
+from indexqueue import BucketQueue, HeapQueue, IndexedQueue
+
+QUEUES = [HeapQueue, BucketQueue]
+
+
+def drain(queue):
+    popped = []
+    while not queue.empty():
+        popped.append(queue.pop())
+    return popped
+
+
+@pytest.mark.parametrize("queue", [IndexedQueue] + QUEUES)
+def test_random_operations(queue):
+    # Checked against a plain dict of priorities; IndexedQueue runs the same checks
+    rng = random.Random(0)
+    expected = {}
+    q = queue()
+    for step in range(3000):
+        if rng.random() < 0.3 and expected:
+            priority, object = q.pop()
+            # Equal priorities may come out in any order
+            assert priority == min(expected.values())
+            assert expected.pop(object) == priority
+        else:
+            object = rng.randrange(200)
+            priority = rng.randrange(30)
+            # A* only ever lowers the priority of a queued object
+            if object not in expected or priority < expected[object]:
+                expected[object] = priority
+                q.add_or_update(priority, object)
+        assert q.size() == len(expected)
+        for object in range(0, 200, 37):
+            assert q.get(object) == ((expected[object], object) if object in expected else None)
+    assert [p for p, o in drain(q)] == sorted(expected.values())
+
+
+@pytest.mark.parametrize("queue", [IndexedQueue] + QUEUES)
+def test_decrease_key(queue):
+    q = queue()
+    for i, priority in enumerate([5, 3, 8, 6]):
+        q.add_or_update(priority, "abcd"[i])
+    q.add_or_update(1, "c")
+    q.add_or_update(4, "d")
+    assert q.get("c") == (1, "c")
+    assert drain(q) == [(1, "c"), (3, "b"), (4, "d"), (5, "a")]
+
+
+def test_bucket_queue_prefers_larger_tie_break():
+    g = {"a": 1, "b": 4, "c": 2, "d": 4, "e": 0}
+    q = BucketQueue(tie_break=g.__getitem__)
+    for object in "abcde":
+        q.add_or_update(7, object)
+    q.add_or_update(3, "e")
+    popped = drain(q)
+    assert popped[0] == (3, "e")
+    assert [g[o] for p, o in popped[1:]] == [4, 4, 2, 1]
+
+
+def test_bucket_queue_skips_stale_priorities_and_ties():
+    g = {"a": 2, "b": 5, "c": 1}
+    q = BucketQueue(tie_break=g.__getitem__)
+    q.add_or_update(1, "a")
+    q.add_or_update(1, "b")
+    q.add_or_update(4, "c")
+    # Moving every object away from priority 1 leaves it stale in the heap
+    q.add_or_update(6, "a")
+    q.add_or_update(6, "b")
+    assert q.pop() == (4, "c")
+    # The emptied bucket and its ties come back with fresh entries
+    q.add_or_update(1, "c")
+    assert drain(q) == [(1, "c"), (6, "b"), (6, "a")]
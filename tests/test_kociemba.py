@@ -0,0 +1,24 @@
+import random
+import time
+from cubie import apply_moves
+from structs import ACTIONS, Cube
+import kociemba
+
+
+def scrambled(seed):
+    rng = random.Random(seed)
+    return apply_moves(Cube(3), [rng.choice(ACTIONS) for i in range(40)])
+
+
+def test_first_solution_solves():
+    cube = scrambled(0)
+    assert apply_moves(cube, kociemba.TwoPhaseSolver().solve(cube)).solved()
+
+
+def test_unreachable_length_budget_terminates(monkeypatch):
+    monkeypatch.setattr(kociemba, "DEFAULT_TIMEOUT", 0.5)
+    cube = scrambled(7)
+    start = time.perf_counter()
+    solution = kociemba.TwoPhaseSolver().solve(cube, max_length=12)
+    assert time.perf_counter() - start < 5
+    assert apply_moves(cube, solution).solved()
@@ -0,0 +1,50 @@
+import random
+import pytest
+from nxn import FaceletCube, ROTATIONS, moves
+from structs import Action, Cube
+
+
+def structs_layer_moves(size):
+    # Actions turning one layer of a structs.Cube, paired with the matching LayerMove.
+    # structs keeps face centres of odd cubes as decorative blocks that never move,
+    # so the middle layer is left out.
+    half = size // 2
+    layers = {m.axis + str(m.layer) + str(m.turns): m for m in moves(size)}
+    pairs = []
+    for axis, (rotate, rrotate, half_turn) in ROTATIONS.items():
+        for layer in range(-half, half + 1):
+            if layer == 0:
+                continue
+            doubled = 2 * layer if size % 2 else (2 * abs(layer) - 1) * (1 if layer > 0 else -1)
+            selects = (lambda axis, layer: lambda b: getattr(b.actual_location, axis) == layer)(axis, layer)
+            for turns, action in ((1, Action(selects, axis, rotate, rrotate)),
+                                  (-1, Action(selects, axis, rrotate, rotate)),
+                                  (2, Action(selects, axis, half_turn))):
+                pairs.append((action, layers[axis + str(doubled) + str(turns)]))
+    return pairs
+
+
+@pytest.mark.parametrize("size", range(2, 8))
+def test_facelet_cube_matches_cube(size):
+    rng = random.Random(size)
+    pairs = structs_layer_moves(size)
+    cube = Cube(size)
+    facelets = FaceletCube(size)
+    assert FaceletCube.from_cube(cube) == facelets and facelets.solved()
+    for i in range(40):
+        action, move = rng.choice(pairs)
+        cube = cube.apply(action)
+        facelets = facelets.apply(move)
+        assert FaceletCube.from_cube(cube) == facelets
+
+
+@pytest.mark.parametrize("size", range(2, 8))
+def test_moves_undo(size):
+    all_moves = moves(size)
+    assert len(all_moves) == 9 * size
+    inverse = {(m.axis, m.layer, m.turns): m for m in all_moves}
+    solved = FaceletCube(size)
+    for m in all_moves:
+        turned = solved.apply(m)
+        assert turned != solved and not turned.solved()
+        assert turned.apply(inverse[(m.axis, m.layer, -m.turns if m.turns != 2 else 2)]) == solved
@@ -0,0 +1,80 @@
+import random
+import pytest
+from cubie import CubieCube, apply_moves
+from patterndb import EdgeOrientationKeyGen, PatternDB, _load_or_build_db, open_mapped_db, save_mapped_db
+from structs import ACTIONS, Cube, corner, edge, top
+from symmetry import preserving_axes
+
+
+def small_db():
+    cube = CubieCube.from_cube(Cube(3).sub_cube(corner))
+    db = PatternDB(ordered_positions=[b.solved_location for b in cube.blocks], default_value=4)
+    frontier = [cube]
+    db.insert_full_cube(cube, 0)
+    for depth in range(1, 4):
+        next_frontier = []
+        for c in frontier:
+            for a in ACTIONS:
+                child = c.apply(a)
+                if db.insert_full_cube(child, depth):
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return db
+
+
+def test_mapped_keys_match_dict(tmp_path):
+    db = small_db()
+    path = str(tmp_path / "corners.rdb")
+    save_mapped_db(db, path)
+    mapped = open_mapped_db(path)
+    assert len(mapped.data.db) == len(db.data.db)
+    for key, value in db.data.db.items():
+        assert mapped.data.db[key] == value
+    rng = random.Random(0)
+    start = CubieCube.from_cube(Cube(3).sub_cube(corner))
+    for i in range(200):
+        cube = apply_moves(start, [rng.choice(ACTIONS) for j in range(rng.randrange(8))])
+        assert mapped.get_from_cube(cube) == db.get_from_cube(cube)
+    assert "missing" not in mapped.data.db
+
+
+def test_unreadable_file_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dbs").mkdir()
+    (tmp_path / "dbs" / "cornertest.rdb").write_bytes(b"not a pattern DB")
+    cube = Cube(3).sub_cube(corner)
+    db = _load_or_build_db("cornertest", cube, 4, ACTIONS, False, {}, 1)
+    assert len(db.data.db) == len(small_db().data.db)
+    assert len(open_mapped_db(str(tmp_path / "dbs" / "cornertest.rdb")).data.db) == len(db.data.db)
+
+
+@pytest.mark.parametrize("name, selector, max_depth, insert_all_permutations, options", [
+    ("dict", top & edge, 4, False, {}),
+    ("ranked", top & corner, 4, False, {"ranked": True}),
+    ("permutations", top & edge, 3, True, {}),
+    ("orientation", edge, 4, False, {"match_on_solved_location": False, "key_generators": [EdgeOrientationKeyGen]}),
+])
+def test_sharded_build_is_identical(tmp_path, monkeypatch, name, selector, max_depth, insert_all_permutations, options):
+    files = []
+    for workers in (1, 2):
+        directory = tmp_path / str(workers)
+        directory.mkdir()
+        monkeypatch.chdir(directory)
+        _load_or_build_db(name, Cube(3).sub_cube(selector), max_depth, ACTIONS, insert_all_permutations, options, workers)
+        files.append((directory / "dbs" / f"{name}.rdb").read_bytes())
+    assert files[0] == files[1]
+
+
+def test_file_with_other_symmetries_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cube = Cube(3).sub_cube(top & edge)
+    plain = _load_or_build_db("topedge", cube, 4, ACTIONS, False, {}, 1)
+    symmetric = _load_or_build_db("topedge", cube, 4, ACTIONS, False, {"symmetries": preserving_axes("z")}, 1)
+    assert symmetric.data.symmetries
+    assert len(symmetric.data.db) < len(plain.data.db)
+    assert open_mapped_db(str(tmp_path / "dbs" / "topedge.rdb")).data.symmetries == symmetric.data.symmetries
+    rng = random.Random(0)
+    solved = CubieCube.from_cube(Cube(3))
+    for i in range(50):
+        state = apply_moves(solved, [rng.choice(ACTIONS) for j in range(rng.randrange(6))])
+        assert symmetric.get_from_cube(state) == plain.get_from_cube(state)
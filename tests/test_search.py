@@ -0,0 +1,42 @@
+import random
+from astar import bidirectional_search, bucket_queue, search, search_compact
+from cubie import CubieCube, apply_moves
+from indexqueue import IndexedQueue
+from structs import ACTIONS, HALF_FACE, Cube
+import Thistlethwaite
+
+
+def half_turn_scramble(seed, length=8):
+    rng = random.Random(seed)
+    return apply_moves(Cube(3), [rng.choice(HALF_FACE) for i in range(length)])
+
+
+def test_bidirectional_search_from_cubie_cube():
+    cube = CubieCube.from_cube(half_turn_scramble(1))
+    states, actions = bidirectional_search(Thistlethwaite.Group3ToFinalProblem(cube))
+    assert apply_moves(cube, actions[1:]).solved()
+
+
+def test_bidirectional_search_matches_cube():
+    cube = half_turn_scramble(2)
+    _, from_cube = bidirectional_search(Thistlethwaite.Group3ToFinalProblem(cube))
+    _, from_cubie = bidirectional_search(Thistlethwaite.Group3ToFinalProblem(CubieCube.from_cube(cube)))
+    assert len(from_cube) == len(from_cubie)
+
+
+def test_compact_search_matches_search():
+    for seed in range(3):
+        cube = CubieCube.from_cube(half_turn_scramble(seed, 12))
+        for queue in (IndexedQueue, bucket_queue):
+            _, expected = search(Thistlethwaite.Group3ToFinalProblem(cube), queue=queue)
+            _, actions = search_compact(Thistlethwaite.Group3ToFinalProblem(cube), queue=queue)
+            assert len(actions) == len(expected)
+            assert apply_moves(cube, actions[1:]).solved()
+
+
+def test_compact_thistlethwaite_solve():
+    rng = random.Random(4)
+    cube = CubieCube.from_cube(apply_moves(Cube(3), [rng.choice(ACTIONS) for i in range(25)]))
+    solution = Thistlethwaite.solve(cube, compact=True)
+    assert apply_moves(cube, solution).solved()
+
@@ -0,0 +1,24 @@
+import random
+from structs import ACTIONS, Cube, top
+
+
+def test_incremental_hash_matches_fresh_hash():
+    rng = random.Random(0)
+    for start in (Cube(3), Cube(3).sub_cube(top)):
+        cube = start
+        hash(cube)
+        for i in range(200):
+            cube = cube.apply(rng.choice(ACTIONS))
+            fresh = Cube(3, list(cube.blocks), cube.decorative_blocks)
+            assert hash(fresh) == hash(cube)
+            assert fresh == cube and cube == fresh
+
+
+def test_equal_states_reached_differently_are_equal():
+    a = Cube(3)
+    hash(a)
+    b = Cube(3)
+    for action in (ACTIONS[0], ACTIONS[0].inverse):
+        a = a.apply(action)
+    assert a == b and hash(a) == hash(b)
+    assert a.apply(ACTIONS[1]) != b
@@ -0,0 +1,54 @@
+import random
+from cubie import CubieCube, apply_moves
+from patterndb import PatternDB
+from structs import ACTIONS, Cube, edge, top
+from symmetry import SYMMETRIES, canonical, preserving_axes
+
+
+def breadth_first_db(cube, max_depth, symmetries=None):
+    db = PatternDB(ordered_positions=[b.solved_location for b in cube.blocks], default_value=max_depth + 1,
+                   ranked=True, symmetries=symmetries)
+    db.insert_full_cube(cube, 0)
+    frontier = [cube]
+    for depth in range(1, max_depth + 1):
+        next_frontier = []
+        for c in frontier:
+            for a in ACTIONS:
+                child = c.apply(a)
+                if db.insert_full_cube(child, depth):
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return db
+
+
+def test_conjugation_commutes_with_moves():
+    rng = random.Random(0)
+    cube = CubieCube.from_cube(Cube(3)).apply_moves([rng.choice(ACTIONS) for i in range(20)])
+    for s in SYMMETRIES:
+        a = rng.choice(ACTIONS)
+        assert s.conjugate(cube.apply(a)) == s.conjugate(cube).apply(s.action(a))
+
+
+def test_canonical_is_shared_by_the_symmetry_class():
+    cube = CubieCube.from_cube(Cube(3)).apply_moves([ACTIONS[1], ACTIONS[7], ACTIONS[12]])
+    representatives = set()
+    for s in SYMMETRIES:
+        # canonical compares codes in the order of the pieces, so fix that order
+        conjugated = s.conjugate(cube)
+        conjugate = dict(zip(conjugated.pieces, conjugated.codes))
+        pieces = tuple(sorted(conjugate))
+        representative, symmetry = canonical(CubieCube(pieces, tuple(conjugate[p] for p in pieces)))
+        representatives.add(frozenset(zip(representative.pieces, representative.codes)))
+    assert len(representatives) == 1
+
+
+def test_symmetric_db_matches_plain_db():
+    cube = CubieCube.from_cube(Cube(3).sub_cube(top & edge))
+    symmetries = [s for s in preserving_axes("z") if s.preserves_actions(ACTIONS)]
+    plain = breadth_first_db(cube, 4)
+    symmetric = breadth_first_db(cube, 4, symmetries)
+    assert len(symmetric.data.db) < len(plain.data.db)
+    rng = random.Random(1)
+    for i in range(300):
+        scrambled = apply_moves(cube, [rng.choice(ACTIONS) for j in range(rng.randrange(7))])
+        assert symmetric.get_from_cube(scrambled) == plain.get_from_cube(scrambled)
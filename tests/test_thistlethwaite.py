@@ -0,0 +1,22 @@
+import random
+from cubie import apply_moves, merge_turns
+from notation import format_moves, parse_moves
+from structs import ACTIONS, Cube
+import Thistlethwaite
+
+
+def test_merge_turns():
+    assert format_moves(merge_turns(parse_moves("F R R2 U U' R B2 B2 L"))) == "F L"
+    assert merge_turns(parse_moves("R R'")) == []
+    assert format_moves(merge_turns(parse_moves("R L R"))) == "R L R"
+
+
+def test_table_solve_has_no_adjacent_same_face_turns():
+    tables = Thistlethwaite.distance_tables()
+    rng = random.Random(0)
+    for i in range(20):
+        cube = apply_moves(Cube(3), [rng.choice(ACTIONS) for j in range(30)])
+        solution = Thistlethwaite.solve_with_tables(cube, tables)
+        assert apply_moves(cube, solution).solved()
+        # Nothing left to merge means no two adjacent turns of one face
+        assert merge_turns(solution) == solution